@@ -1,22 +1,202 @@
-import sqlite3
-from flask import Flask, render_template, request, redirect, url_for, jsonify, send_from_directory
+import time
+_import_started = time.perf_counter()
+
+from flask import Flask, render_template, request, redirect, url_for, jsonify, send_from_directory, send_file
 from datetime import datetime
 import pytz
 import database  # type: ignore
+import media_gc  # type: ignore
+import backup  # type: ignore
+import id_cards  # type: ignore
+import profiling  # type: ignore
+import thumbnails  # type: ignore
+import assets  # type: ignore
+from scan_guard import TokenBucketLimiter, RequestCoalescer  # type: ignore
 import os
 import base64
-import qrcode  # type: ignore
-from flask import session, make_response ## 1:30
+import hashlib
+import threading
+import uuid
+from flask import session, make_response, stream_template, g ## 1:30
+from itertools import chain
+from werkzeug.security import safe_join
 
 app = Flask(__name__)## 1:30
-app.secret_key = "your_secret_key"  # REQUIRED for session :130
 
-# Ensure static directories exist
-os.makedirs('static/photos', exist_ok=True)
-os.makedirs('static/qr_codes', exist_ok=True)
+# Settings; override through the environment or create_app(NAME=value)
+app.config.update(
+    SECRET_KEY=os.environ.get("SECRET_KEY", "your_secret_key"),  # REQUIRED for session :130
+    DATABASE=database.DB_NAME,
+    # Periodic sweep of orphaned photos/QR codes (0 disables)
+    MEDIA_GC_INTERVAL=int(os.environ.get("MEDIA_GC_INTERVAL", "3600")),
+    # Online database snapshots (0 disables)
+    BACKUP_INTERVAL=int(os.environ.get("BACKUP_INTERVAL", "3600")),
+    # Scan API protection: per-device token bucket...
+    SCAN_RATE_PER_SEC=float(os.environ.get("SCAN_RATE_PER_SEC", "2")),
+    SCAN_BURST=int(os.environ.get("SCAN_BURST", "10")),
+    SCAN_LIMITER_MAX_DEVICES=int(os.environ.get("SCAN_LIMITER_MAX_DEVICES", "10000")),
+    # ...inside a per-address bucket (shared by the kiosks behind one address)
+    SCAN_ADDRESS_RATE_PER_SEC=float(os.environ.get("SCAN_ADDRESS_RATE_PER_SEC", "10")),
+    SCAN_ADDRESS_BURST=int(os.environ.get("SCAN_ADDRESS_BURST", "40")),
+    # Seconds an admin list/summary query may run before it is interrupted (0 disables)
+    REPORT_TIME_LIMIT=float(os.environ.get("REPORT_TIME_LIMIT", "10")),
+    # Rebuild static/dist on startup; turn off when the deploy step builds it
+    BUILD_ASSETS=os.environ.get("BUILD_ASSETS", "1") == "1",
+)
+app.jinja_env.globals["asset_url"] = assets.asset_url
+
+# Scan API protection: per-address and per-device token buckets + coalescing of identical scans
+scan_address_limiter = None
+scan_limiter = None
+scan_coalescer = RequestCoalescer()
+
+# Import and create_app() durations, reported by /api/admin/startup
+STARTUP_TIMINGS = {}
+_initialized = False
+_started_jobs = set()
+_init_lock = threading.Lock()
+
+
+def create_app(**settings):
+    """Apply settings, prepare the database and static files, and return the app.
+
+    Importing this module has no side effects; this does the work instead
+    (and runs on the first request if a server loads `app:app` directly).
+    For example create_app(DATABASE="test.db", MEDIA_GC_INTERVAL=0,
+    BACKUP_INTERVAL=0). database.py holds the path in a module global, so
+    there is one configured app per process; calling this again re-points it.
+    """
+    with _init_lock:
+        _initialize(settings)
+    return app
+
+def _initialize(settings):
+    """create_app's work; the caller holds _init_lock"""
+    global _initialized, scan_address_limiter, scan_limiter
+
+    started = time.perf_counter()
+    app.config.update(settings)
+
+    if database.DB_NAME != app.config["DATABASE"]:
+        database.DB_NAME = app.config["DATABASE"]
+        database.close_read_pool()
+    schema_built = database.init_db()
+
+    # Ensure static directories exist
+    os.makedirs(database.media_file('static/photos'), exist_ok=True)
+    os.makedirs(database.media_file('static/qr_codes'), exist_ok=True)
+    if app.config["BUILD_ASSETS"]:
+        assets.build()
+    else:
+        assets.load_manifest()
+
+    scan_address_limiter = TokenBucketLimiter(
+        rate=app.config["SCAN_ADDRESS_RATE_PER_SEC"],
+        capacity=app.config["SCAN_ADDRESS_BURST"],
+        max_keys=app.config["SCAN_LIMITER_MAX_DEVICES"],
+    )
+    scan_limiter = TokenBucketLimiter(
+        rate=app.config["SCAN_RATE_PER_SEC"],
+        capacity=app.config["SCAN_BURST"],
+        max_keys=app.config["SCAN_LIMITER_MAX_DEVICES"],
+    )
+
+    # Background threads are started once per process
+    if app.config["MEDIA_GC_INTERVAL"] > 0 and "media_gc" not in _started_jobs:
+        media_gc.start_background_gc(app.config["MEDIA_GC_INTERVAL"])
+        _started_jobs.add("media_gc")
+    if app.config["BACKUP_INTERVAL"] > 0 and "backup" not in _started_jobs:
+        backup.start_backup_scheduler(app.config["BACKUP_INTERVAL"])
+        _started_jobs.add("backup")
+
+    STARTUP_TIMINGS["init_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    STARTUP_TIMINGS["schema_built"] = schema_built
+    _initialized = True
+
+@app.before_request
+def ensure_initialized():
+    # Checked again under the lock so concurrent first requests initialize once
+    if not _initialized:
+        with _init_lock:
+            if not _initialized:
+                _initialize({})
+
+
+def versioned_etag(tables, template=None, *extra):
+    """Build a weak ETag from the change counters of the given tables.
+
+    The template's mtime and any extra values (e.g. the selected date) are
+    mixed in so that a redeploy or a different filter never reuses a tag.
+    """
+    versions = database.get_table_versions(*tables)
+    parts = [f"{table}:{versions[table]}" for table in tables]
+    if template:
+        template_path = os.path.join(app.root_path, app.template_folder, template)
+        parts.append(f"{template}:{os.path.getmtime(template_path)}:{assets.build_id}")
+    parts.extend(str(value) for value in extra)
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:20]
+
+def not_modified(etag):
+    """Return a 304 response if the client already has this ETag, else None"""
+    if request.if_none_match.contains_weak(etag):
+        return with_etag(make_response("", 304), etag)
+    return None
+
+def with_etag(response, etag):
+    """Attach a weak ETag and force revalidation on every view"""
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache, must-revalidate'
+    response.vary.add('Cookie')
+    return response
+
+@app.before_request
+def start_request_profile():
+    # Opt-in, admin-only cProfile + SQL timing of a single request
+    if profiling.should_profile(session.get("admin_logged"), request.headers, request.args):
+        g.request_profile = profiling.RequestProfile()
+        g.request_profile.start()
+
+@app.after_request
+def finish_request_profile(response):
+    request_profile = g.pop("request_profile", None)
+    if request_profile is None:
+        return response
+    
+    route, method, path = request.endpoint, request.method, request.full_path
+    # Streamed bodies are produced after this hook, so save once the response closes
+    response.call_on_close(
+        lambda: request_profile.stop_and_save(route, method, path, response.status_code)
+    )
+    return response
+
+# Streamed pages are flushed to the client in chunks of about this many characters
+STREAM_CHUNK_SIZE = 16 * 1024
+
+def stream_page(template_name, **context):
+    """Render a template with stream_template, flushing it in STREAM_CHUNK_SIZE chunks"""
+    # stream_template binds the request context, so it must be called here
+    pieces = stream_template(template_name, **context)
+
+    def chunks():
+        buffer, size = [], 0
+        for piece in pieces:
+            buffer.append(piece)
+            size += len(piece)
+            if size >= STREAM_CHUNK_SIZE:
+                yield "".join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield "".join(buffer)
+
+    return app.response_class(chunks(), mimetype="text/html")
+
+@app.errorhandler(database.QueryTimeout)
+def query_timeout(e):
+    return jsonify({
+        'success': False,
+        'message': f'{e}; narrow the request and try again'
+    }), 503
 
-# Initialize database on startup
-database.init_db()
 
 @app.route("/")
 def home():
@@ -103,6 +283,11 @@ def admin_dashboard():
         {"label": "LOGOUT", "endpoint": "home"},
     ]
 
+    etag = versioned_etag(("admin",), "admin_page.html")
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     all_admins = database.get_all_admins()
     users = []
     for admin in all_admins:
@@ -120,12 +305,8 @@ def admin_dashboard():
         active_endpoint="admin_dashboard",
     ))
 
-    # Disable browser caching
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-
-    return response
+    # Browser may keep the page but must revalidate it (logout -> redirect)
+    return with_etag(response, etag)
 
     
 @app.route("/admin/students")##
@@ -141,38 +322,41 @@ def admin_students():
         {"label": "LOGOUT", "endpoint": "home"},
     ]
     
-    # Get all students from database
-    all_students = database.get_all_students()
-    
-    # Format students for template
-    students = []
-    for student in all_students:
-        students.append({
-            "id": student["id"],
-            "last": student["lastname"],
-            "first": student["firstname"],
-            "course": student["course"],
-            "level": student["level"]
-        })
+    etag = versioned_etag(("students", "courses", "levels"), "student_mngt.html")
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
+    # Rows are read lazily while the page streams out
+    students = database.iter_students()
+    first = next(students, None)
+    if first:
+        students = chain([first], students)
     
     # Default student profile
     student_profile = {
-        "id": students[0]["id"] if students else "0001",
-        "name": f"{students[0]['last']}, {students[0]['first']}" if students else "sample, user",
-        "course": f"{students[0]['course']}-{students[0]['level']}" if students else "BSIT-3",
+        "id": first.id if first else "0001",
+        "name": f"{first.last}, {first.first}" if first else "sample, user",
+        "course": f"{first.course}-{first.level}" if first else "BSIT-3",
     }
     
-    return render_template(
+    response = stream_page(
         "student_mngt.html",
         nav_items=nav_items,
         active_endpoint="admin_students",
         student_profile=student_profile,
         students=students,
+        dimensions=database.get_dimensions(),
     )
+    return with_etag(response, etag)
 
 
 @app.route("/admin/attendance", methods=["GET", "POST"])
 def admin_attendance():
+    # Redirect to login if not logged in
+    if not session.get("admin_logged"):
+        return redirect(url_for("admin_login"))
+
     nav_items = [
         {"label": "USER MANAGEMENTT", "endpoint": "admin_dashboard"},
         {"label": "STUDENT MANAGMENT", "endpoint": "admin_students"},
@@ -185,31 +369,89 @@ def admin_attendance():
     if not selected_date:
         selected_date = datetime.now().strftime("%Y-%m-%d")
     
-    # Get attendance records for the selected date
-    attendance = database.get_attendance_by_date(selected_date)
-
-    # 👉 SORT HERE (earliest time-in first)
+    etag = versioned_etag(("attendance", "students"), "view_attendance.html", selected_date)
+    cached = not_modified(etag)
+    if cached:
+        return cached
     
-    try:
-        attendance = sorted(
-            attendance,
-            key=lambda x: datetime.strptime(x["time_in"], "%I:%M %p")
-        )
-    except:
-        pass  # In case format differs, avoid crash
+    # Attendance records for the selected date, earliest time-in first
+    # (sorted in SQL and read lazily while the page streams out)
+    attendance = database.iter_attendance_by_date(selected_date)
 
-    return render_template(
+    response = stream_page(
         "view_attendance.html",
         nav_items=nav_items,
         active_endpoint="admin_attendance",
         attendance=attendance,
         selected_date=selected_date,
     )
+    return with_etag(response, etag)
+
+
+@app.route("/admin/profiles")
+def admin_profiles():
+    if not session.get("admin_logged"):
+        return redirect(url_for("admin_login"))
+    
+    return render_template(
+        "profiles.html",
+        nav_items=PROFILE_NAV_ITEMS,
+        active_endpoint="admin_profiles",
+        profiles=profiling.list_profiles(),
+        profile=None,
+    )
+
+@app.route("/admin/profiles/<name>")
+def admin_profile_detail(name):
+    if not session.get("admin_logged"):
+        return redirect(url_for("admin_login"))
+    
+    profile = profiling.load_profile(name)
+    if not profile:
+        return redirect(url_for("admin_profiles"))
+    
+    return render_template(
+        "profiles.html",
+        nav_items=PROFILE_NAV_ITEMS,
+        active_endpoint="admin_profiles",
+        profiles=[],
+        profile=profile,
+    )
+
+PROFILE_NAV_ITEMS = [
+    {"label": "USER MANAGEMENT", "endpoint": "admin_dashboard"},
+    {"label": "STUDENT MANAGEMENT", "endpoint": "admin_students"},
+    {"label": "ATTENDANCE", "endpoint": "admin_attendance"},
+    {"label": "PROFILES", "endpoint": "admin_profiles"},
+    {"label": "LOGOUT", "endpoint": "home"},
+]
 
 
 @app.route("/student")
 def student():
-    return render_template("student.html")  
+    dimensions = database.get_dimensions()
+    # New students can't be enrolled as graduated or archived
+    levels = [level for level in dimensions['levels'] if level['name'] not in database.INACTIVE_LEVELS]
+    return render_template("student.html", dimensions=dimensions, levels=levels)
+
+@app.route("/admin/kiosk")
+def enroll_kiosk():
+    """Mark this browser as a scanning kiosk, then open the scanner.
+
+    An admin visits this once on each kiosk device. The flag lives in the
+    (signed, permanent) session, so it survives admin logout and lets the
+    kiosk download the roster and replay offline scans with their times.
+    """
+    if not session.get("admin_logged"):
+        return redirect(url_for("admin_login"))
+    
+    session["kiosk"] = True
+    session.permanent = True
+    return redirect(url_for("home"))
+
+def is_kiosk():
+    """True for enrolled kiosks (see enroll_kiosk) and logged-in admins"""
+    return bool(session.get("kiosk") or session.get("admin_logged"))
 
 @app.route("/admin/logout")
 def admin_logout():
@@ -264,6 +506,240 @@ def delete_attendance_api(attendance_id):
         }), 500
     
 
+def _bulk_attendance_filters(data):
+    """Pull the shared bulk-operation filters out of a JSON request body"""
+    ids = data.get('ids') or None
+    if ids is not None:
+        if not isinstance(ids, list):
+            raise ValueError("ids must be a list")
+        ids = [int(i) for i in ids]
+    return {
+        'ids': ids,
+        'start_date': data.get('start_date'),
+        'end_date': data.get('end_date'),
+        'course': data.get('course'),
+        'level': data.get('level'),
+        'dry_run': bool(data.get('dry_run')),
+    }
+
+@app.route("/api/attendance/bulk-delete", methods=["POST"])
+def bulk_delete_attendance_api():
+    """API endpoint to delete attendance records by id list, date range or course/level"""
+    if not session.get("admin_logged"):
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized'
+        }), 401
+    
+    try:
+        filters = _bulk_attendance_filters(request.get_json() or {})
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'message': f'Invalid filters: {str(e)}'
+        }), 400
+    
+    result, error_msg = database.bulk_delete_attendance(**filters)
+    if result is None:
+        return jsonify({
+            'success': False,
+            'message': error_msg
+        }), 400
+    
+    return jsonify({
+        'success': True,
+        'dry_run': filters['dry_run'],
+        'matched': result['matched'],
+        'deleted': result['deleted'],
+        'message': f"{result['matched']} record(s) matched, {result['deleted']} deleted"
+    })
+
+@app.route("/api/attendance/bulk-redate", methods=["POST"])
+def bulk_redate_attendance_api():
+    """API endpoint to move attendance records to another date by id list, date range or course/level"""
+    if not session.get("admin_logged"):
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized'
+        }), 401
+    
+    data = request.get_json() or {}
+    try:
+        filters = _bulk_attendance_filters(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'message': f'Invalid filters: {str(e)}'
+        }), 400
+    
+    result, error_msg = database.bulk_redate_attendance(data.get('new_date'), **filters)
+    if result is None:
+        return jsonify({
+            'success': False,
+            'message': error_msg
+        }), 400
+    
+    return jsonify({
+        'success': True,
+        'dry_run': filters['dry_run'],
+        'matched': result['matched'],
+        'updated': result['updated'],
+        'skipped': result['skipped'],
+        'updated_ids': result['updated_ids'],
+        'message': f"{result['matched']} record(s) matched, {result['updated']} moved, {result['skipped']} skipped"
+    })
+
+def _bulk_student_ids(data):
+    """Pull an optional student id list out of a JSON request body"""
+    ids = data.get('ids') or None
+    if ids is not None:
+        if not isinstance(ids, list):
+            raise ValueError("ids must be a list")
+        ids = [str(i) for i in ids]
+    return ids
+
+def _bulk_student_response(result, error_msg, dry_run):
+    """JSON response shared by the bulk promote/graduate/transfer endpoints"""
+    if result is None:
+        return jsonify({
+            'success': False,
+            'message': error_msg
+        }), 400
+
+    if dry_run:
+        message = f"{result['matched']} student(s) would change"
+    else:
+        message = f"{result['updated']} student(s) updated"
+        if result['batch_id']:
+            message += f" (batch {result['batch_id']}, can be undone)"
+    return jsonify({
+        'success': True,
+        'dry_run': dry_run,
+        'batch_id': result['batch_id'],
+        'matched': result['matched'],
+        'updated': result['updated'],
+        'changes': result['changes'],
+        'message': message
+    })
+
+@app.route("/api/students/bulk-promote", methods=["POST"])
+def bulk_promote_students_api():
+    """API endpoint to move every student (or one course/level) up a level"""
+    if not session.get("admin_logged"):
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized'
+        }), 401
+
+    data = request.get_json() or {}
+    dry_run = bool(data.get('dry_run'))
+    result, error_msg = database.promote_students(
+        course=data.get('course'),
+        level=data.get('level'),
+        graduate=bool(data.get('graduate')),
+        dry_run=dry_run
+    )
+    return _bulk_student_response(result, error_msg, dry_run)
+
+@app.route("/api/students/bulk-graduate", methods=["POST"])
+def bulk_graduate_students_api():
+    """API endpoint to graduate (or archive) the final level or selected students"""
+    if not session.get("admin_logged"):
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized'
+        }), 401
+
+    data = request.get_json() or {}
+    try:
+        ids = _bulk_student_ids(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'message': f'Invalid filters: {str(e)}'
+        }), 400
+
+    dry_run = bool(data.get('dry_run'))
+    result, error_msg = database.graduate_students(
+        ids=ids,
+        course=data.get('course'),
+        level=data.get('level'),
+        archive=bool(data.get('archive')),
+        dry_run=dry_run
+    )
+    return _bulk_student_response(result, error_msg, dry_run)
+
+@app.route("/api/students/bulk-transfer", methods=["POST"])
+def bulk_transfer_students_api():
+    """API endpoint to move selected students (by id list or course/level) to another course"""
+    if not session.get("admin_logged"):
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized'
+        }), 401
+
+    data = request.get_json() or {}
+    try:
+        ids = _bulk_student_ids(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'message': f'Invalid filters: {str(e)}'
+        }), 400
+
+    dry_run = bool(data.get('dry_run'))
+    result, error_msg = database.transfer_students(
+        data.get('new_course'),
+        ids=ids,
+        course=data.get('course'),
+        level=data.get('level'),
+        dry_run=dry_run
+    )
+    return _bulk_student_response(result, error_msg, dry_run)
+
+@app.route("/api/students/batches", methods=["GET"])
+def list_student_batches_api():
+    """API endpoint to list recent bulk student operations"""
+    if not session.get("admin_logged"):
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized'
+        }), 401
+
+    return jsonify({
+        'success': True,
+        'batches': database.list_student_batches()
+    })
+
+@app.route("/api/students/batches/<int:batch_id>/undo", methods=["POST"])
+def undo_student_batch_api(batch_id):
+    """API endpoint to undo a bulk student operation"""
+    if not session.get("admin_logged"):
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized'
+        }), 401
+
+    dry_run = bool((request.get_json(silent=True) or {}).get('dry_run'))
+    result, error_msg = database.undo_student_batch(batch_id, dry_run=dry_run)
+    if result is None:
+        return jsonify({
+            'success': False,
+            'message': error_msg
+        }), 404 if error_msg == "Batch not found" else 400
+
+    verb = "would be restored" if dry_run else "restored"
+    return jsonify({
+        'success': True,
+        'dry_run': dry_run,
+        'matched': result['matched'],
+        'restored': result['restored'],
+        'skipped': result['skipped'],
+        'message': f"{result['restored']} of {result['matched']} student(s) {verb}, "
+                   f"{result['skipped']} changed since and skipped"
+    })
+
+
 @app.route("/admin_page")
 def admin_page():
     return render_template("admin_page.html")
@@ -408,6 +884,16 @@ def generate_student_id():
             'message': f'Error: {str(e)}'
         }), 500
 
+def remove_media_files(*paths):
+    """Best-effort removal of student photo/QR files"""
+    for path in paths:
+        if not path:
+            continue
+        try:
+            os.remove(database.media_file(path))
+        except OSError:
+            pass
+
 @app.route("/api/student/add", methods=["POST"])
 def add_student_api():
     """API endpoint to add a new student"""
@@ -426,8 +912,20 @@ def add_student_api():
                 'message': 'All fields are required'
             }), 400
         
+        # Files are named after the student, so never touch an existing student's
+        if database.get_student(student_id):
+            return jsonify({
+                'success': False,
+                'message': 'Student ID already exists'
+            }), 400
+        
+        # Files are written under temporary names and only renamed once the
+        # row is saved; on failure just this request's files are removed
+        upload_id = uuid.uuid4().hex
+        
         # Save photo to file
         photo_path = None
+        photo_tmp = None
         if photo_base64:
             try:
                 # Remove data URL prefix if present
@@ -437,10 +935,12 @@ def add_student_api():
                 photo_data = base64.b64decode(photo_base64)
                 photo_filename = f"{student_id}_photo.png"
                 photo_path = f"static/photos/{photo_filename}"
+                photo_tmp = f"{photo_path}.{upload_id}.tmp"
                 
-                with open(photo_path, 'wb') as f:
+                with open(database.media_file(photo_tmp), 'wb') as f:
                     f.write(photo_data)
             except Exception as e:
+                remove_media_files(photo_tmp)
                 return jsonify({
                     'success': False,
                     'message': f'Error saving photo: {str(e)}'
@@ -448,7 +948,11 @@ def add_student_api():
         
         # Generate and save QR code
         qr_path = None
+        qr_tmp = None
         try:
+            # Imported here rather than at the top: it is slow to load and only this route needs it
+            import qrcode  # type: ignore
+            
             qr = qrcode.QRCode(
                 version=1,
                 error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -461,8 +965,10 @@ def add_student_api():
             qr_img = qr.make_image(fill_color="black", back_color="white")
             qr_filename = f"{student_id}_qr.png"
             qr_path = f"static/qr_codes/{qr_filename}"
-            qr_img.save(qr_path)
+            qr_tmp = f"{qr_path}.{upload_id}.tmp"
+            qr_img.save(database.media_file(qr_tmp), format="PNG")
         except Exception as e:
+            remove_media_files(photo_tmp, qr_tmp)
             return jsonify({
                 'success': False,
                 'message': f'Error generating QR code: {str(e)}'
@@ -472,6 +978,9 @@ def add_student_api():
         success, error_msg = database.add_student(student_id, lastname, firstname, course, level, photo_path, qr_path)
         
         if success:
+            for tmp, path in ((photo_tmp, photo_path), (qr_tmp, qr_path)):
+                if tmp:
+                    os.replace(database.media_file(tmp), database.media_file(path))
             return jsonify({
                 'success': True,
                 'message': 'Student added successfully',
@@ -480,11 +989,8 @@ def add_student_api():
                 'qr_path': qr_path
             })
         else:
-            # Clean up files if database save failed
-            if photo_path and os.path.exists(photo_path):
-                os.remove(photo_path)
-            if qr_path and os.path.exists(qr_path):
-                os.remove(qr_path)
+            # Clean up this request's files if database save failed
+            remove_media_files(photo_tmp, qr_tmp)
             return jsonify({
                 'success': False,
                 'message': error_msg or 'Failed to add student'
@@ -496,6 +1002,89 @@ def add_student_api():
             'message': f'Error: {str(e)}'
         }), 500
 
+@app.route("/api/students", methods=["GET"])
+def list_students_api():
+    """API endpoint to list all students (supports If-None-Match)"""
+    if not session.get("admin_logged"):
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized'
+        }), 401
+    
+    etag = versioned_etag(("students",), None, "api")
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
+    response = jsonify({
+        'success': True,
+        'students': database.get_all_students(app.config["REPORT_TIME_LIMIT"])
+    })
+    return with_etag(response, etag)
+
+@app.route("/api/attendance", methods=["GET"])
+def list_attendance_api():
+    """API endpoint to list attendance for a date (supports If-None-Match)"""
+    if not session.get("admin_logged"):
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized'
+        }), 401
+    
+    selected_date = request.args.get('date') or datetime.now().strftime("%Y-%m-%d")
+    etag = versioned_etag(("attendance", "students"), None, "api", selected_date)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
+    response = jsonify({
+        'success': True,
+        'date': selected_date,
+        'attendance': database.get_attendance_by_date(selected_date, app.config["REPORT_TIME_LIMIT"])
+    })
+    return with_etag(response, etag)
+
+@app.route("/api/dimensions", methods=["GET"])
+def dimensions_api():
+    """API endpoint listing the course and level pickers (supports If-None-Match)"""
+    etag = versioned_etag(("courses", "levels"), None, "api")
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
+    dims = database.get_dimensions()
+    response = jsonify({
+        'success': True,
+        'courses': dims['courses'],
+        'levels': dims['levels']
+    })
+    return with_etag(response, etag)
+
+@app.route("/api/attendance/summary", methods=["GET"])
+def attendance_summary_api():
+    """API endpoint counting attendance per course/level over a date range"""
+    if not session.get("admin_logged"):
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized'
+        }), 401
+    
+    today = datetime.now().strftime("%Y-%m-%d")
+    start_date = request.args.get('start_date') or today
+    end_date = request.args.get('end_date') or start_date
+    etag = versioned_etag(("attendance", "students", "courses", "levels"), None, "summary", start_date, end_date)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
+    response = jsonify({
+        'success': True,
+        'start_date': start_date,
+        'end_date': end_date,
+        'summary': database.get_attendance_summary(start_date, end_date, app.config["REPORT_TIME_LIMIT"])
+    })
+    return with_etag(response, etag)
+
 @app.route("/api/student/get/<student_id>", methods=["GET"])
 def get_student_api(student_id):
     """API endpoint to get a student by ID"""
@@ -521,26 +1110,27 @@ def get_student_api(student_id):
 
 @app.route("/api/student/delete/<student_id>", methods=["DELETE", "POST"])
 def delete_student_api(student_id):
-    """API endpoint to delete a student"""
+    """API endpoint to delete a student, their attendance and their media files"""
     try:
-        conn = database.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM students WHERE id = ?', (student_id,))
-        conn.commit()
-        deleted = cursor.rowcount > 0
-        conn.close()
+        deleted, error_msg, media_paths = database.delete_student(student_id)
         
         if deleted:
+            # Anything left behind here is picked up by the media GC
+            remove_media_files(*media_paths)
             return jsonify({
                 'success': True,
                 'message': 'Student deleted successfully'
             })
-        else:
+        elif error_msg == "Student not found":
             return jsonify({
                 'success': False,
-                'message': 'Student not found'
+                'message': error_msg
             }), 404
+        else:
+            return jsonify({
+                'success': False,
+                'message': error_msg or 'Failed to delete student'
+            }), 500
             
     except Exception as e:
         return jsonify({
@@ -548,12 +1138,105 @@ def delete_student_api(student_id):
             'message': f'Error: {str(e)}'
         }), 500
 
+@app.route("/api/cards/print", methods=["POST"])
+def print_cards_api():
+    """API endpoint to start an ID-card print job for a list of ids or a course/level"""
+    if not session.get("admin_logged"):
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized'
+        }), 401
+    
+    data = request.get_json() or {}
+    try:
+        ids = _bulk_student_ids(data)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    job_id, error_msg = id_cards.start_print_job(
+        student_ids=ids,
+        course=data.get('course'),
+        level=data.get('level'),
+        page_size=data.get('page_size', 'A4')
+    )
+    if error_msg:
+        return jsonify({
+            'success': False,
+            'message': error_msg
+        }), 400
+    
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status_url': url_for('print_job_status_api', job_id=job_id)
+    }), 202
+
+@app.route("/api/cards/jobs/<job_id>", methods=["GET"])
+def print_job_status_api(job_id):
+    """API endpoint to check the progress of an ID-card print job"""
+    if not session.get("admin_logged"):
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized'
+        }), 401
+    
+    job = id_cards.get_job(job_id)
+    if not job:
+        return jsonify({
+            'success': False,
+            'message': 'Print job not found'
+        }), 404
+    
+    job.pop('pdf_path', None)
+    if job['status'] == 'done':
+        job['pdf_url'] = url_for('print_job_pdf', job_id=job_id)
+    return jsonify({
+        'success': True,
+        'job': job
+    })
+
+@app.route("/api/cards/jobs/<job_id>/pdf", methods=["GET"])
+def print_job_pdf(job_id):
+    """Download the PDF of a finished ID-card print job"""
+    if not session.get("admin_logged"):
+        return redirect(url_for("admin_login"))
+    
+    job = id_cards.get_job(job_id)
+    if not job or job['status'] != 'done':
+        return jsonify({
+            'success': False,
+            'message': 'Print job not found or not finished'
+        }), 404
+    
+    return send_file(job['pdf_path'], mimetype='application/pdf',
+                     download_name=f"id-cards-{job_id}.pdf")
+
 @app.route("/api/scan-attendance", methods=["POST"])
 def scan_attendance():
     """API endpoint to record attendance from QR code scan"""
+    # X-Device-Id is chosen by the client, so it only splits the bucket of
+    # the address it comes from; the address bucket caps everything behind it
+    address = request.remote_addr
+    allowed, retry_after = scan_address_limiter.allow(address)
+    if allowed:
+        allowed, retry_after = scan_limiter.allow((address, request.headers.get('X-Device-Id')))
+    if not allowed:
+        response = jsonify({
+            'success': False,
+            'message': 'Too many scans, please wait a moment'
+        })
+        response.headers['Retry-After'] = str(max(1, round(retry_after)))
+        return response, 429
+    
     try:
         data = request.get_json()
         student_id = data.get('student_id')
+        # Set by kiosks replaying scans they queued while offline; anyone
+        # else gets the time the server received the scan
+        scanned_at = data.get('scanned_at') if is_kiosk() else None
         
         if not student_id:
             return jsonify({
@@ -561,8 +1244,17 @@ def scan_attendance():
                 'message': 'Student ID is required'
             }), 400
         
-        # Record attendance
-        attendance_data, message = database.record_attendance(student_id)
+        scan_time, error_msg = database.resolve_scan_time(scanned_at)
+        if error_msg:
+            return jsonify({
+                'success': False,
+                'message': error_msg
+            }), 400
+        
+        # Record attendance (simultaneous scans of the same student for the
+        # same day share one DB operation, live or replayed)
+        attendance_data, message = scan_coalescer.run((student_id, scan_time.strftime("%Y-%m-%d")),
+                                                      database.record_attendance, student_id, scan_time)
         
         if attendance_data and isinstance(attendance_data, dict) and 'student_id' in attendance_data:
             # Success - attendance recorded
@@ -594,6 +1286,188 @@ def scan_attendance():
             'message': f'Error: {str(e)}'
         }), 500
     
+# Field order of the compact roster rows sent to kiosks
+ROSTER_FIELDS = ["id", "lastname", "firstname", "course", "level", "thumb_url"]
+
+def _roster_rows(students):
+    return [
+        [s.id, s.last, s.first, s.course, s.level,
+         url_for('roster_thumbnail', student_id=s.id, v=s.version) if s.photo else None]
+        for s in students
+    ]
+
+@app.route("/api/roster", methods=["GET"])
+def roster_snapshot_api():
+    """API endpoint with the full kiosk roster and its version, for local QR validation"""
+    if not is_kiosk():
+        return jsonify({
+            'success': False,
+            'message': 'This device is not an enrolled kiosk'
+        }), 401
+    
+    etag = versioned_etag(("students", "courses", "levels"), None, "roster")
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    
+    roster = database.get_roster()
+    response = jsonify({
+        'success': True,
+        'version': roster['version'],
+        'fields': ROSTER_FIELDS,
+        'students': _roster_rows(roster['students'])
+    })
+    return with_etag(response, etag)
+
+@app.route("/api/roster/changes", methods=["GET"])
+def roster_changes_api():
+    """API endpoint with the roster rows added/changed/deleted since a version"""
+    if not is_kiosk():
+        return jsonify({
+            'success': False,
+            'message': 'This device is not an enrolled kiosk'
+        }), 401
+    
+    since = request.args.get('since', type=int)
+    if since is None or since < 0:
+        return jsonify({
+            'success': False,
+            'message': 'since must be a roster version'
+        }), 400
+    
+    roster = database.get_roster(since)
+    if since > roster['version']:
+        # The kiosk is ahead of the server (e.g. after a restore); start over
+        return jsonify({
+            'success': True,
+            'reset': True,
+            'version': roster['version'],
+            'message': 'Roster version is unknown, fetch /api/roster again'
+        })
+    
+    return jsonify({
+        'success': True,
+        'version': roster['version'],
+        'fields': ROSTER_FIELDS,
+        'students': _roster_rows(roster['students']),
+        'deleted': roster['deleted']
+    })
+
+@app.route("/api/roster/thumb/<student_id>")
+def roster_thumbnail(student_id):
+    """Small photo for the kiosk greeting; the ?v= roster version makes the URL immutable"""
+    if not is_kiosk():
+        return jsonify({
+            'success': False,
+            'message': 'This device is not an enrolled kiosk'
+        }), 401
+    
+    student = database.get_student(student_id)
+    try:
+        path = thumbnails.get_thumbnail(database.media_file(student['photo'])) if student else None
+    except OSError:
+        # Not a readable image (PIL's decode errors are OSErrors)
+        path = None
+    if not path:
+        return jsonify({
+            'success': False,
+            'message': 'No photo'
+        }), 404
+    
+    response = send_file(path, mimetype='image/jpeg', max_age=31536000, conditional=True)
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+@app.route("/api/admin/media-gc", methods=["GET", "POST"])
+def media_gc_api():
+    """API endpoint to run the orphaned-media GC (POST) or view its last report (GET)"""
+    if not session.get("admin_logged"):
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized'
+        }), 401
+    
+    if request.method == "GET":
+        return jsonify({
+            'success': True,
+            'report': media_gc.last_report
+        })
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        report = media_gc.collect_garbage(
+            delete=bool(data.get('delete')),
+            dry_run=bool(data.get('dry_run'))
+        )
+        return jsonify({
+            'success': True,
+            'report': report
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error: {str(e)}'
+        }), 500
+
+@app.route("/api/admin/backups", methods=["GET", "POST"])
+def backups_api():
+    """API endpoint to list database snapshots (GET) or take one now (POST)"""
+    if not session.get("admin_logged"):
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized'
+        }), 401
+    
+    if request.method == "GET":
+        return jsonify({
+            'success': True,
+            'backups': backup.list_backups(),
+            'last_report': backup.last_report
+        })
+    
+    report, error_msg = backup.create_backup("manual")
+    if error_msg:
+        return jsonify({
+            'success': False,
+            'message': f'Backup failed: {error_msg}'
+        }), 500
+    return jsonify({
+        'success': True,
+        'report': report
+    })
+
+@app.route("/api/admin/scan-stats", methods=["GET"])
+def scan_stats_api():
+    """API endpoint exposing scan rate-limiter and coalescing counters"""
+    if not session.get("admin_logged"):
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized'
+        }), 401
+    
+    return jsonify({
+        'success': True,
+        'address_limiter': scan_address_limiter.stats(),
+        'rate_limiter': scan_limiter.stats(),
+        'coalescer': scan_coalescer.stats()
+    })
+
+@app.route("/api/admin/startup", methods=["GET"])
+def startup_stats_api():
+    """API endpoint reporting how long this process took to import and initialize"""
+    if not session.get("admin_logged"):
+        return jsonify({
+            'success': False,
+            'message': 'Unauthorized'
+        }), 401
+
+    return jsonify({
+        'success': True,
+        'database': database.DB_NAME,
+        'schema_version': database.SCHEMA_VERSION,
+        **STARTUP_TIMINGS
+    })
+
 @app.route('/static/check_user')
 def check_user():
     profile = {
@@ -605,6 +1479,28 @@ def check_user():
     }
     return render_template('check_user.html', profile=profile)
 
+# Built assets have content-hashed names, so they can be cached forever
+@app.route('/static/dist/<path:filename>')
+def serve_built_asset(filename):
+    # safe_join refuses anything that would leave DIST_DIR (../, absolute paths)
+    path = safe_join(assets.DIST_DIR, filename)
+    if path is None or filename.endswith(('.gz', '.br')) or not os.path.isfile(path):
+        return jsonify({'success': False, 'message': 'Not found'}), 404
+
+    mimetype = 'text/css' if filename.endswith('.css') else 'text/javascript'
+    encoding = None
+    for ext, name in (('.br', 'br'), ('.gz', 'gzip')):
+        if name in request.accept_encodings and os.path.isfile(path + ext):
+            path, encoding = path + ext, name
+            break
+
+    response = send_file(path, mimetype=mimetype, max_age=31536000, conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    response.vary.add('Accept-Encoding')
+    return response
+
 # Route to serve static files (photos and QR codes)
 @app.route('/static/<path:filename>')
 def serve_static(filename):
@@ -612,10 +1508,7 @@ def serve_static(filename):
 
 @app.route("/admin/delete_future_attendance")
 def delete_future_attendance():
-    import os
-    # Ensure we are connecting to the correct database
-    db_path = os.path.join(os.path.dirname(__file__), 'attendance.db')
-    conn = sqlite3.connect(db_path)
+    conn = database.get_db_connection()
     cursor = conn.cursor()
     
     cursor.execute("DELETE FROM attendance WHERE date > DATE('now', 'localtime')")
@@ -625,6 +1518,7 @@ def delete_future_attendance():
     
     return f"{deleted} future attendance entries deleted."
 
+STARTUP_TIMINGS["import_ms"] = round((time.perf_counter() - _import_started) * 1000, 1)
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""Minify, fingerprint and precompress the page CSS/JS.
+
+Sources live in static/css and static/js; the build writes
+static/dist/<name>.<hash>.<ext> plus .gz (and .br when the optional
+brotli package is installed) next to it. Templates link assets through
+asset_url(), so a changed file gets a new URL and everything can be cached
+forever.
+
+    python assets.py             # rebuild static/dist
+    python assets.py --vendor    # download pinned third-party libraries
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+SOURCE_DIRS = ("css", "js")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+VENDOR_DIR = os.path.join(STATIC_DIR, "vendor")
+MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.json")
+
+# Pinned third-party libraries; served from static/vendor once downloaded,
+# from the CDN until then
+VENDOR = {
+    "vendor/qrcode.min.js": "https://cdn.jsdelivr.net/npm/qrcode@1.5.3/build/qrcode.min.js",
+    "vendor/html5-qrcode.min.js": "https://unpkg.com/html5-qrcode@2.3.8/html5-qrcode.min.js",
+}
+
+# Don't bother compressing tiny files
+MIN_COMPRESS_SIZE = 512
+
+manifest = {}
+build_id = ""
+
+
+def minify_css(css):
+    """Strip comments and redundant whitespace from a stylesheet"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    # "+" and "-" are left alone: calc() needs the spaces around them
+    css = re.sub(r"\s*([{};:,>])\s*", r"\1", css)
+    css = css.replace(";}", "}")
+    return css.strip()
+
+
+def minify_js(js):
+    """Conservative JS minifier: drops indentation, blank lines and
+    whole-line // comments, so no statement can change meaning"""
+    lines = []
+    for line in js.splitlines():
+        line = line.strip()
+        if line and not line.startswith("//"):
+            lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+
+def _write(path, data):
+    # A unique temp name per call: several workers may build at once
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                    dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    # mkstemp makes the file private; built assets are public
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+def build():
+    """Build every source asset into DIST_DIR and return the manifest"""
+    global manifest, build_id
+
+    os.makedirs(DIST_DIR, exist_ok=True)
+    new_manifest = {}
+    for folder in SOURCE_DIRS:
+        source_dir = os.path.join(STATIC_DIR, folder)
+        if not os.path.isdir(source_dir):
+            continue
+        for filename in sorted(os.listdir(source_dir)):
+            stem, ext = os.path.splitext(filename)
+            if ext not in MINIFIERS:
+                continue
+            with open(os.path.join(source_dir, filename), encoding="utf-8") as f:
+                data = MINIFIERS[ext](f.read()).encode("utf-8")
+
+            digest = hashlib.sha256(data).hexdigest()[:10]
+            out_name = f"{stem}.{digest}{ext}"
+            out_path = os.path.join(DIST_DIR, out_name)
+            if not os.path.exists(out_path):
+                _write(out_path, data)
+                if len(data) >= MIN_COMPRESS_SIZE:
+                    _write(out_path + ".gz", gzip.compress(data, 9, mtime=0))
+                    if brotli is not None:
+                        _write(out_path + ".br", brotli.compress(data, quality=11))
+            new_manifest[f"{folder}/{filename}"] = f"dist/{out_name}"
+
+    _write(MANIFEST_PATH, json.dumps(new_manifest, indent=2, sort_keys=True).encode())
+    _prune(new_manifest)
+    manifest = new_manifest
+    build_id = hashlib.sha256(json.dumps(new_manifest, sort_keys=True).encode()).hexdigest()[:10]
+    return new_manifest
+
+
+def load_manifest():
+    """Use the manifest of an earlier build (when startup skips build())"""
+    global manifest, build_id
+
+    try:
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    build_id = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()[:10]
+    return manifest
+
+
+def _prune(current):
+    """Remove outputs from earlier builds"""
+    keep = {os.path.basename(path) for path in current.values()}
+    for name in os.listdir(DIST_DIR):
+        base = name[:-3] if name.endswith((".gz", ".br")) else name
+        # .tmp files are another process's write in progress
+        if base != "manifest.json" and base not in keep and not name.endswith(".tmp"):
+            try:
+                os.remove(os.path.join(DIST_DIR, name))
+            except OSError:
+                pass
+
+
+def asset_url(name):
+    """URL of a built asset (e.g. "css/student.css") for use in templates"""
+    if name in VENDOR:
+        if os.path.exists(os.path.join(STATIC_DIR, name)):
+            return f"/static/{name}"
+        return VENDOR[name]
+    built = manifest.get(name)
+    return f"/static/{built or name}"
+
+
+def download_vendor():
+    """Fetch the pinned third-party libraries into VENDOR_DIR"""
+    import urllib.request
+
+    os.makedirs(VENDOR_DIR, exist_ok=True)
+    for name, url in VENDOR.items():
+        with urllib.request.urlopen(url, timeout=30) as response:
+            data = response.read()
+        path = os.path.join(STATIC_DIR, name)
+        _write(path, data)
+        print(f"Saved {url} -> {path} ({len(data)} bytes)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build fingerprinted, compressed static assets")
+    parser.add_argument("--vendor", action="store_true", help="download pinned third-party libraries")
+    args = parser.parse_args()
+
+    if args.vendor:
+        download_vendor()
+    for source, built in sorted(build().items()):
+        path = os.path.join(STATIC_DIR, built)
+        sizes = [f"{os.path.getsize(path)} B"]
+        for ext in (".gz", ".br"):
+            if os.path.exists(path + ext):
+                sizes.append(f"{ext[1:]} {os.path.getsize(path + ext)} B")
+        print(f"{source:<28} -> {built}  ({', '.join(sizes)})")
@@ -0,0 +1,317 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+import database  # type: ignore
+
+BACKUP_DIR = os.path.join(database.APP_DIR, "backups")
+# Every worker process runs the scheduler; this file lets only one snapshot at a time
+LOCK_PATH = os.path.join(BACKUP_DIR, ".lock")
+
+# How many snapshots of each kind to keep
+RETENTION = {
+    "hourly": int(os.environ.get("BACKUP_KEEP_HOURLY", "24")),
+    "daily": int(os.environ.get("BACKUP_KEEP_DAILY", "14")),
+    "manual": int(os.environ.get("BACKUP_KEEP_MANUAL", "10")),
+    "pre-restore": 3,
+}
+
+_lock = threading.Lock()
+last_report = None
+
+
+def _verify(path):
+    """Return None if the database file passes integrity_check, else the problem"""
+    conn = sqlite3.connect(database.read_only_uri(path), uri=True)
+    try:
+        result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+    finally:
+        conn.close()
+    return None if result == "ok" else result
+
+
+def _copy(source_path, target_path):
+    """Copy one database into another with the online backup API.
+
+    The copy is done in a single step. A stepped backup starts over whenever
+    another connection commits between steps, so under steady scan traffic it
+    might never finish; one step reads a single WAL snapshot and writers carry
+    on meanwhile.
+    """
+    progress = {"steps": 0, "pages": 0}
+
+    def on_progress(status, remaining, total):
+        progress["steps"] += 1
+        progress["pages"] = total
+
+    src = sqlite3.connect(source_path)
+    dst = sqlite3.connect(target_path)
+    try:
+        src.backup(dst, pages=-1, progress=on_progress)
+    finally:
+        dst.close()
+        src.close()
+    return progress
+
+
+def list_backups(kind=None):
+    """List snapshots as dicts (newest first), optionally for one kind"""
+    backups = []
+    kinds = [kind] if kind else list(RETENTION)
+    for k in kinds:
+        folder = os.path.join(BACKUP_DIR, k)
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            if not name.endswith(".db"):
+                continue
+            path = os.path.join(folder, name)
+            backups.append({
+                "kind": k,
+                "name": name,
+                "path": path,
+                "size_bytes": os.path.getsize(path),
+                "created_at": datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec="seconds"),
+            })
+    backups.sort(key=lambda b: b["name"], reverse=True)
+    return backups
+
+
+def _rotate(kind):
+    """Delete the oldest snapshots of `kind` beyond its retention count"""
+    removed = 0
+    for old in list_backups(kind)[RETENTION.get(kind, 10):]:
+        os.remove(old["path"])
+        removed += 1
+    return removed
+
+
+@contextmanager
+def _exclusive():
+    """Hold the in-process lock and the lock file shared by all worker processes"""
+    with _lock:
+        os.makedirs(BACKUP_DIR, exist_ok=True)
+        with open(LOCK_PATH, "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def create_backup(kind="manual"):
+    """Take a verified online snapshot of the live database.
+
+    Returns (report, None) on success or (None, error message).
+    """
+    with _exclusive():
+        return _take_backup(kind)
+
+
+def _take_backup(kind):
+    """create_backup's work; the caller holds _exclusive()"""
+    global last_report
+
+    started = time.time()
+    folder = os.path.join(BACKUP_DIR, kind)
+    os.makedirs(folder, exist_ok=True)
+    name = f"attendance-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.db"
+    path = os.path.join(folder, name)
+    fd, tmp_path = tempfile.mkstemp(prefix=name + ".", suffix=".part", dir=folder)
+    os.close(fd)
+
+    try:
+        progress = _copy(database.DB_NAME, tmp_path)
+        problem = _verify(tmp_path)
+        if problem:
+            raise sqlite3.DatabaseError(f"integrity check failed: {problem}")
+        os.replace(tmp_path, path)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        last_report = {
+            "kind": kind,
+            "success": False,
+            "error": str(e),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        return None, str(e)
+
+    report = {
+        "kind": kind,
+        "success": True,
+        "path": path,
+        "size_bytes": os.path.getsize(path),
+        "pages": progress["pages"],
+        "steps": progress["steps"],
+        "duration_ms": round((time.time() - started) * 1000, 1),
+        "rotated": _rotate(kind),
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    last_report = report
+    return report, None
+
+
+def restore_backup(path):
+    """Replace the live database contents with a snapshot.
+
+    The snapshot is verified first and the current database is saved as a
+    "pre-restore" backup. Returns (True, None) or (False, error message).
+    """
+    if not os.path.exists(path):
+        return False, "Backup not found"
+
+    problem = _verify(path)
+    if problem:
+        return False, f"Backup failed integrity check: {problem}"
+
+    _, error_msg = create_backup("pre-restore")
+    if error_msg:
+        return False, f"Could not save current database: {error_msg}"
+
+    with _exclusive():
+        try:
+            _copy(path, database.DB_NAME)
+        except Exception as e:
+            return False, str(e)
+    database.close_read_pool()
+    return True, None
+
+
+def check_under_writes(seconds=2.0, rows_per_commit=20):
+    """Snapshot a scratch copy of the database while another thread keeps committing.
+
+    Returns (report, None) if the snapshot finished within `seconds` and
+    passed integrity_check while writes went on, else (None, error message).
+    """
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch = os.path.join(tmp, "scratch.db")
+        target = os.path.join(tmp, "snapshot.db")
+        _copy(database.DB_NAME, scratch)
+
+        conn = sqlite3.connect(scratch)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS backup_check (id INTEGER PRIMARY KEY, payload TEXT)")
+        conn.commit()
+        conn.close()
+
+        stop = threading.Event()
+        commits = [0]
+
+        def writer():
+            conn = sqlite3.connect(scratch, timeout=5)
+            try:
+                while not stop.is_set():
+                    conn.executemany("INSERT INTO backup_check (payload) VALUES (?)",
+                                     [("x" * 200,)] * rows_per_commit)
+                    conn.commit()
+                    commits[0] += 1
+            finally:
+                conn.close()
+
+        thread = threading.Thread(target=writer, name="backup-check-writer", daemon=True)
+        thread.start()
+        while not commits[0] and thread.is_alive():
+            time.sleep(0.001)
+        commits_before = commits[0]
+        started = time.time()
+        result = {}
+
+        def snapshot():
+            try:
+                result["progress"] = _copy(scratch, target)
+            except Exception as e:
+                result["error"] = str(e)
+
+        copier = threading.Thread(target=snapshot, name="backup-check-copy", daemon=True)
+        copier.start()
+        copier.join(seconds)
+        commits_during = commits[0] - commits_before
+        stop.set()
+        thread.join()
+
+        if copier.is_alive():
+            copier.join()
+            return None, f"snapshot did not finish within {seconds} s under writes"
+        if "error" in result:
+            return None, result["error"]
+        problem = _verify(target)
+        if problem:
+            return None, f"integrity check failed: {problem}"
+
+        return {
+            "pages": result["progress"]["pages"],
+            "steps": result["progress"]["steps"],
+            "writer_commits": commits_during,
+            "duration_ms": round((time.time() - started) * 1000, 1),
+        }, None
+
+
+def start_backup_scheduler(interval):
+    """Take an hourly snapshot every `interval` seconds, plus one daily snapshot per day"""
+    def loop():
+        while True:
+            time.sleep(interval)
+            with _exclusive():
+                # Another worker's scheduler may have just taken this round's snapshot
+                scheduled = list_backups("hourly") + list_backups("daily")
+                if any(time.time() - os.path.getmtime(b["path"]) < interval / 2 for b in scheduled):
+                    continue
+                today = datetime.now().strftime("%Y%m%d")
+                have_daily = any(today in b["name"] for b in list_backups("daily"))
+                report, error_msg = _take_backup("hourly" if have_daily else "daily")
+            if error_msg:
+                print(f"Backup failed: {error_msg}")
+
+    thread = threading.Thread(target=loop, name="backup-scheduler", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Back up or restore the attendance database")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backup_cmd = sub.add_parser("backup", help="take a snapshot now")
+    backup_cmd.add_argument("--kind", default="manual", choices=sorted(RETENTION))
+    sub.add_parser("list", help="list snapshots")
+    restore_cmd = sub.add_parser("restore", help="restore a snapshot")
+    restore_cmd.add_argument("path")
+    check_cmd = sub.add_parser("check", help="check that a snapshot completes while writes continue")
+    check_cmd.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    if args.command == "backup":
+        result, error = create_backup(args.kind)
+        if error:
+            raise SystemExit(f"Backup failed: {error}")
+        print(f"Saved {result['path']} ({result['size_bytes']} bytes, "
+              f"{result['pages']} pages in {result['steps']} steps, {result['duration_ms']} ms)")
+    elif args.command == "list":
+        for b in list_backups():
+            print(f"{b['kind']:<12} {b['name']}  {b['size_bytes']} bytes")
+    elif args.command == "check":
+        result, error = check_under_writes(args.seconds)
+        if error:
+            raise SystemExit(f"Check failed: {error}")
+        print(f"Snapshot of {result['pages']} pages finished in {result['steps']} step(s), "
+              f"{result['duration_ms']} ms, with {result['writer_commits']} writer commits alongside")
+    else:
+        ok, error = restore_backup(args.path)
+        if not ok:
+            raise SystemExit(f"Restore failed: {error}")
+        print(f"Restored {args.path}")
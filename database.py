@@ -1,8 +1,61 @@
 import sqlite3
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
 
-DB_NAME = "attendance.db"
+# Data files live next to the code, wherever the process was started from; the
+# database too unless ATTENDANCE_DB says otherwise (create_app can override it)
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_NAME = os.environ.get("ATTENDANCE_DB", os.path.join(APP_DIR, "attendance.db"))
+
+# Compact rows yielded by the iter_* listing functions (no per-row dicts)
+StudentListRow = namedtuple("StudentListRow", "id last first course level")
+AttendanceListRow = namedtuple("AttendanceListRow", "id student_id last first course level time_in")
+# Kiosk roster rows (see get_roster); version is the student's last change
+RosterRow = namedtuple("RosterRow", "id last first course level photo version")
+
+# time_in is stored as "08:05 AM"; this orders it chronologically in SQL
+TIME_IN_MINUTES = '''
+    (CAST(substr(a.time_in, 1, 2) AS INTEGER) % 12) * 60
+    + CAST(substr(a.time_in, 4, 2) AS INTEGER)
+    + CASE WHEN substr(a.time_in, 7, 2) = 'PM' THEN 720 ELSE 0 END
+'''
+
+# Read-only connections kept for reporting queries (see read_connection)
+READ_POOL_SIZE = int(os.environ.get("READ_POOL_SIZE", "4"))
+_read_pool = queue.LifoQueue(maxsize=READ_POOL_SIZE)
+
+# Tables whose writes bump a counter in change_version (used for ETags)
+VERSIONED_TABLES = ("students", "attendance", "admin", "courses", "levels")
+
+# Dimension rows seeded on first run (the options the enrollment form offered)
+DEFAULT_COURSES = ("BSCE", "BSIT", "BSCRIM", "BSHM", "BSME", "BSN", "BSCS")
+DEFAULT_LEVELS = ("1", "2", "3", "4")
+
+# Promotion moves numbered levels up by one; students past FINAL_LEVEL are
+# graduated into GRADUATED_LEVEL (or set aside in ARCHIVED_LEVEL)
+FINAL_LEVEL = os.environ.get("FINAL_LEVEL", DEFAULT_LEVELS[-1])
+GRADUATED_LEVEL = "Graduated"
+ARCHIVED_LEVEL = "Archived"
+# Levels students end up in, never enrolled into
+INACTIVE_LEVELS = (GRADUATED_LEVEL, ARCHIVED_LEVEL)
+
+# Kiosks may queue scans while offline; older queued scans are refused
+OFFLINE_SCAN_MAX_AGE = timedelta(hours=int(os.environ.get("OFFLINE_SCAN_MAX_AGE_HOURS", "24")))
+# Allowed kiosk clock drift ahead of the server
+SCAN_CLOCK_SKEW = timedelta(minutes=5)
+
+# Bump whenever init_db's tables, views, triggers or indexes change, so that
+# existing databases get the new schema on the next start
+SCHEMA_VERSION = 2
+
+# Cached course/level lists, refreshed when their change_version moves
+_dimension_cache = {"versions": None, "data": None}
 
 
 
@@ -12,11 +65,12 @@ def update_student(student_id, firstname, lastname, course, level):
     cursor = conn.cursor()
     
     try:
+        course_id, level_id = _dimension_ids_for_write(cursor, course, level)
         cursor.execute('''
             UPDATE students
-            SET firstname = ?, lastname = ?, course = ?, level = ?
+            SET firstname = ?, lastname = ?, course_id = ?, level_id = ?
             WHERE id = ?
-        ''', (firstname, lastname, course, level, student_id))
+        ''', (firstname, lastname, course_id, level_id, student_id))
         conn.commit()
         updated = cursor.rowcount > 0
         conn.close()
@@ -26,29 +80,151 @@ def update_student(student_id, firstname, lastname, course, level):
         return False, str(e)
 
 
+# Per-thread list of (sql, milliseconds) while a request is being profiled
+_sql_recorder = threading.local()
+
+def start_sql_recording():
+    """Start timing every statement this thread runs (see profiling.py)"""
+    _sql_recorder.log = []
+
+def stop_sql_recording():
+    """Stop timing statements and return the recorded (sql, ms) pairs"""
+    log = getattr(_sql_recorder, "log", None) or []
+    _sql_recorder.log = None
+    return log
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that records statement timings while recording is on"""
+    
+    def _timed(self, method, sql, parameters):
+        log = getattr(_sql_recorder, "log", None)
+        if log is None:
+            return method(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return method(sql, parameters)
+        finally:
+            log.append((" ".join(sql.split())[:500], (time.perf_counter() - started) * 1000))
+    
+    def execute(self, sql, parameters=()):
+        return self._timed(super().execute, sql, parameters)
+    
+    def executemany(self, sql, parameters):
+        return self._timed(super().executemany, sql, parameters)
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors (including conn.execute) are TimedCursors"""
+    
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
 def get_db_connection():
     """Create and return a database connection"""
-    conn = sqlite3.connect(DB_NAME)
+    conn = sqlite3.connect(DB_NAME, factory=TimedConnection)
     conn.row_factory = sqlite3.Row
     return conn
 
+class QueryTimeout(Exception):
+    """A read_connection query ran past its time_limit"""
+
+def read_only_uri(path):
+    """SQLite URI opening `path` read-only (quoted, so ?, # and % in the path are safe)"""
+    return f"{Path(path).resolve().as_uri()}?mode=ro"
+
+def _open_read_connection():
+    """Open a read-only connection for reporting queries"""
+    conn = sqlite3.connect(read_only_uri(DB_NAME), uri=True, check_same_thread=False,
+                           factory=TimedConnection)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+@contextmanager
+def read_connection(time_limit=None):
+    """Borrow a pooled read-only connection.
+
+    Readers see a WAL snapshot, so long reports never block record_attendance.
+    With time_limit (seconds) the query is interrupted once it runs too long
+    and QueryTimeout is raised.
+    """
+    try:
+        conn = _read_pool.get_nowait()
+    except queue.Empty:
+        conn = _open_read_connection()
+    
+    if time_limit:
+        deadline = time.monotonic() + time_limit
+        conn.set_progress_handler(lambda: time.monotonic() > deadline, 10000)
+    
+    try:
+        yield conn
+    except sqlite3.OperationalError as e:
+        if time_limit and str(e) == "interrupted":
+            raise QueryTimeout(f"Query ran longer than {time_limit} s") from e
+        raise
+    finally:
+        if time_limit:
+            conn.set_progress_handler(None, 0)
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            _read_pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+def close_read_pool():
+    """Close every pooled read-only connection and drop cached lookups
+    (e.g. after DB_NAME changes or a restore)"""
+    while True:
+        try:
+            _read_pool.get_nowait().close()
+        except queue.Empty:
+            break
+    _dimension_cache.update(versions=None, data=None)
+
+def media_file(path):
+    """Filesystem path of a stored media path such as static/photos/0001_photo.png"""
+    return os.path.join(APP_DIR, path) if path else path
+
 def init_db():
-    """Initialize the database with required tables"""
+    """Initialize the database with required tables.
+
+    Skipped when the file's PRAGMA user_version already equals
+    SCHEMA_VERSION. Returns True if the schema was (re)built.
+    """
     conn = get_db_connection()
+    if conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+        conn.close()
+        return False
     cursor = conn.cursor()
     
-    # Create students table
+    # WAL lets the read-only reporting connections run alongside kiosk writes
+    cursor.execute("PRAGMA journal_mode = WAL")
+    
+    # Course and level (section) lookup tables, referenced by integer key
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS courses (
+            id INTEGER PRIMARY KEY,
+            code TEXT UNIQUE NOT NULL
+        )
+    ''')
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS students (
-            id TEXT PRIMARY KEY,
-            lastname TEXT NOT NULL,
-            firstname TEXT NOT NULL,
-            course TEXT NOT NULL,
-            level TEXT NOT NULL,
-            photo TEXT,
-            qr_code TEXT
+        CREATE TABLE IF NOT EXISTS levels (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL
         )
     ''')
+    cursor.executemany('INSERT OR IGNORE INTO courses (code) VALUES (?)', [(c,) for c in DEFAULT_COURSES])
+    cursor.executemany('INSERT OR IGNORE INTO levels (name) VALUES (?)', [(l,) for l in DEFAULT_LEVELS])
+    
+    # Create students table
+    cursor.execute(STUDENTS_TABLE_SQL.format(name="students"))
     
     # Create attendance table
     cursor.execute('''
@@ -71,9 +247,314 @@ def init_db():
         )
     ''')
     
+    # Per-table change counters, maintained by triggers so that every write
+    # (including raw SQL in app.py and the cleanup scripts) is counted
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_version (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    for table in VERSIONED_TABLES:
+        cursor.execute(
+            'INSERT OR IGNORE INTO change_version (table_name, version) VALUES (?, 0)',
+            (table,)
+        )
+    
+    # Bulk student operations (promotion, graduation, transfer) and the
+    # per-student before/after values needed to undo them
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS student_batches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            operation TEXT NOT NULL,
+            description TEXT NOT NULL,
+            student_count INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            undone_at TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS student_batch_changes (
+            batch_id INTEGER NOT NULL REFERENCES student_batches(id),
+            student_id TEXT NOT NULL,
+            old_course_id INTEGER NOT NULL,
+            old_level_id INTEGER NOT NULL,
+            new_course_id INTEGER NOT NULL,
+            new_level_id INTEGER NOT NULL,
+            PRIMARY KEY (batch_id, student_id)
+        )
+    ''')
+    
+    # Latest change per student for kiosk roster sync: every insert/update
+    # gets the next version (deletes leave a tombstone), written by triggers
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS roster_changes (
+            student_id TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            deleted INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    
+    conn.commit()
+    _migrate_student_dimensions(conn)
+    
+    # Students with course/level names resolved; every read goes through this
+    cursor.execute('''
+        CREATE VIEW IF NOT EXISTS student_details AS
+        SELECT s.id, s.lastname, s.firstname, c.code AS course, l.name AS level,
+               s.photo, s.qr_code, s.course_id, s.level_id
+        FROM students s
+        JOIN courses c ON c.id = s.course_id
+        JOIN levels l ON l.id = s.level_id
+    ''')
+    
+    # Students that predate the roster change log start at version 1
+    cursor.execute('''
+        INSERT OR IGNORE INTO roster_changes (student_id, version, deleted)
+        SELECT id, 1, 0 FROM students
+    ''')
+    
+    _create_triggers(cursor)
+    _create_indexes(cursor)
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
     conn.commit()
     conn.close()
     print(f"Database '{DB_NAME}' initialized successfully!")
+    return True
+
+STUDENTS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS {name} (
+        id TEXT PRIMARY KEY,
+        lastname TEXT NOT NULL,
+        firstname TEXT NOT NULL,
+        course_id INTEGER NOT NULL REFERENCES courses(id),
+        level_id INTEGER NOT NULL REFERENCES levels(id),
+        photo TEXT,
+        qr_code TEXT
+    )
+'''
+
+def _migrate_student_dimensions(conn):
+    """Move a pre-dimension students table (free-text course/level) onto integer keys"""
+    columns = {row["name"] for row in conn.execute('PRAGMA table_info(students)')}
+    if "course" not in columns:
+        return
+    
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        # The cascade trigger would wipe attendance when the old table goes
+        _drop_triggers(cursor)
+        cursor.execute('DROP VIEW IF EXISTS student_details')
+        
+        cursor.execute('INSERT OR IGNORE INTO courses (code) SELECT DISTINCT course FROM students')
+        cursor.execute('INSERT OR IGNORE INTO levels (name) SELECT DISTINCT level FROM students')
+        cursor.execute(STUDENTS_TABLE_SQL.format(name="students_new"))
+        cursor.execute('''
+            INSERT INTO students_new (id, lastname, firstname, course_id, level_id, photo, qr_code)
+            SELECT s.id, s.lastname, s.firstname, c.id, l.id, s.photo, s.qr_code
+            FROM students s
+            JOIN courses c ON c.code = s.course
+            JOIN levels l ON l.name = s.level
+        ''')
+        cursor.execute('DROP TABLE students')
+        cursor.execute('ALTER TABLE students_new RENAME TO students')
+        conn.commit()
+        print("Migrated students.course/level to the courses/levels tables")
+    except Exception:
+        conn.rollback()
+        raise
+
+def get_dimensions():
+    """Get the course and level lists, cached until either table changes.
+
+    Returns {'courses': [{'id', 'code'}], 'levels': [{'id', 'name'}],
+    'course_ids': {code: id}, 'level_ids': {name: id}}.
+    """
+    versions = get_table_versions("courses", "levels")
+    cached = _dimension_cache
+    if cached["versions"] == versions:
+        return cached["data"]
+    
+    with read_connection() as conn:
+        courses = [dict(row) for row in conn.execute('SELECT id, code FROM courses ORDER BY code')]
+        levels = [dict(row) for row in conn.execute('SELECT id, name FROM levels ORDER BY name')]
+    
+    data = {
+        'courses': courses,
+        'levels': levels,
+        'course_ids': {row['code']: row['id'] for row in courses},
+        'level_ids': {row['name']: row['id'] for row in levels},
+    }
+    _dimension_cache.update(versions=versions, data=data)
+    return data
+
+def _dimension_ids(course=None, level=None):
+    """Map course/level names to their keys for filtering (0 matches nothing)"""
+    dims = get_dimensions()
+    course_id = dims['course_ids'].get(course, 0) if course else None
+    level_id = dims['level_ids'].get(level, 0) if level else None
+    return course_id, level_id
+
+def _dimension_ids_for_write(cursor, course, level):
+    """Get (course_id, level_id), adding new courses/levels as needed"""
+    return _course_id_for_write(cursor, course), _level_id_for_write(cursor, level)
+
+def _course_id_for_write(cursor, course):
+    course = course.strip()
+    cursor.execute('INSERT OR IGNORE INTO courses (code) VALUES (?)', (course,))
+    return cursor.execute('SELECT id FROM courses WHERE code = ?', (course,)).fetchone()[0]
+
+def _level_id_for_write(cursor, level):
+    level = str(level).strip()
+    cursor.execute('INSERT OR IGNORE INTO levels (name) VALUES (?)', (level,))
+    return cursor.execute('SELECT id FROM levels WHERE name = ?', (level,)).fetchone()[0]
+
+ROSTER_CHANGE_SQL = '''
+    INSERT OR REPLACE INTO roster_changes (student_id, version, deleted)
+    VALUES ({student_id}, {version}, {deleted})
+'''
+NEXT_ROSTER_VERSION = "(SELECT COALESCE(MAX(version), 0) + 1 FROM roster_changes)"
+
+def _create_triggers(cursor):
+    """Create the cascade and change-version triggers (see init_db)"""
+    # Deleting a student removes their attendance too. The attendance FK has
+    # no ON DELETE CASCADE (and SQLite can't add one without a table rebuild),
+    # so a trigger does it; this also covers raw DELETEs issued elsewhere.
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS students_delete_cascade
+        AFTER DELETE ON students
+        BEGIN
+            DELETE FROM attendance WHERE student_id = OLD.id;
+        END
+    ''')
+    
+    for op, row, deleted in (("INSERT", "NEW", 0), ("UPDATE", "NEW", 0), ("DELETE", "OLD", 1)):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS students_{op.lower()}_roster
+            AFTER {op} ON students
+            BEGIN
+                {ROSTER_CHANGE_SQL.format(student_id=f"{row}.id", version=NEXT_ROSTER_VERSION, deleted=deleted)};
+            END
+        ''')
+    
+    for table in VERSIONED_TABLES:
+        for op in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_{op.lower()}_version
+                AFTER {op} ON {table}
+                BEGIN
+                    UPDATE change_version SET version = version + 1
+                    WHERE table_name = '{table}';
+                END
+            ''')
+
+def _drop_triggers(cursor):
+    cursor.execute('DROP TRIGGER IF EXISTS students_delete_cascade')
+    for op in ("insert", "update", "delete"):
+        cursor.execute(f'DROP TRIGGER IF EXISTS students_{op}_roster')
+    for table in VERSIONED_TABLES:
+        for op in ("insert", "update", "delete"):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {table}_{op}_version')
+
+# Secondary indexes: the scan path looks up (student_id, date), admin views filter by date
+INDEXES = {
+    "idx_attendance_student_date": "attendance (student_id, date)",
+    "idx_attendance_date": "attendance (date)",
+    "idx_students_course_level": "students (course_id, level_id)",
+    "idx_roster_changes_version": "roster_changes (version)",
+}
+
+def _create_indexes(cursor):
+    for name, columns in INDEXES.items():
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {columns}')
+
+def _drop_indexes(cursor):
+    for name in INDEXES:
+        cursor.execute(f'DROP INDEX IF EXISTS {name}')
+
+def bulk_load(students, attendance):
+    """Load many rows at once, for seeding test and benchmark databases.
+
+    students yields (id, lastname, firstname, course, level, photo, qr_code)
+    and attendance yields (student_id, date, time_in); both may be lazy.
+    Everything runs in one transaction with executemany. Triggers are
+    dropped for the load and rebuilt once at the end, as are the secondary
+    indexes when attendance starts out empty (rebuilding them over existing
+    rows would cost more than it saves). Durability pragmas are relaxed on
+    this connection only.
+    Returns ({'students': n, 'attendance': n}, None) or (None, error message).
+    """
+    conn = get_db_connection()
+    conn.isolation_level = None     # manage the transaction explicitly
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA synchronous = OFF")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    cursor.execute("PRAGMA cache_size = -262144")  # 256 MB
+    
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        _drop_triggers(cursor)
+        
+        # Resolve course/level names to keys once per distinct value
+        students = list(students)
+        keys = {}
+        for row in students:
+            if (row[3], row[4]) not in keys:
+                keys[(row[3], row[4])] = _dimension_ids_for_write(cursor, row[3], row[4])
+        students = [row[:3] + keys[(row[3], row[4])] + tuple(row[5:]) for row in students]
+        
+        defer_indexes = cursor.execute("SELECT 1 FROM attendance LIMIT 1").fetchone() is None
+        if defer_indexes:
+            _drop_indexes(cursor)
+        
+        cursor.executemany('''
+            INSERT INTO students (id, lastname, firstname, course_id, level_id, photo, qr_code)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', students)
+        student_count = cursor.rowcount
+        cursor.executemany('''
+            INSERT INTO attendance (student_id, date, time_in)
+            VALUES (?, ?, ?)
+        ''', attendance)
+        attendance_count = cursor.rowcount
+        
+        # The roster triggers are off during the load; log the new students under one version
+        version = cursor.execute(f"SELECT {NEXT_ROSTER_VERSION}").fetchone()[0]
+        cursor.executemany(
+            ROSTER_CHANGE_SQL.format(student_id="?", version="?", deleted=0),
+            ((row[0], version) for row in students)
+        )
+        
+        if defer_indexes:
+            _create_indexes(cursor)
+        _create_triggers(cursor)
+        cursor.execute(
+            "UPDATE change_version SET version = version + 1 "
+            "WHERE table_name IN ('students', 'attendance', 'courses', 'levels')"
+        )
+        cursor.execute("COMMIT")
+        cursor.execute("ANALYZE")
+        return {'students': student_count, 'attendance': attendance_count}, None
+    except Exception as e:
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        return None, str(e)
+    finally:
+        conn.close()
+
+def get_table_versions(*tables):
+    """Get the change counters for the given tables as {table: version}"""
+    placeholders = ", ".join("?" for _ in tables)
+    with read_connection() as conn:
+        cursor = conn.execute(
+            f'SELECT table_name, version FROM change_version WHERE table_name IN ({placeholders})',
+            tables
+        )
+        versions = {row["table_name"]: row["version"] for row in cursor.fetchall()}
+    
+    return {table: versions.get(table, 0) for table in tables}
 
 def generate_unique_student_id():
     """Generate a unique 4-digit student ID"""
@@ -97,10 +578,11 @@ def add_student(student_id, lastname, firstname, course, level, photo_path=None,
     cursor = conn.cursor()
     
     try:
+        course_id, level_id = _dimension_ids_for_write(cursor, course, level)
         cursor.execute('''
-            INSERT INTO students (id, lastname, firstname, course, level, photo, qr_code)
+            INSERT INTO students (id, lastname, firstname, course_id, level_id, photo, qr_code)
             VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (student_id, lastname, firstname, course, level, photo_path, qr_code_path))
+        ''', (student_id, lastname, firstname, course_id, level_id, photo_path, qr_code_path))
         conn.commit()
         return True, None
     except sqlite3.IntegrityError:
@@ -111,22 +593,101 @@ def add_student(student_id, lastname, firstname, course, level, photo_path=None,
     finally:
         conn.close()
 
+def delete_student(student_id):
+    """Delete a student (and, via trigger, their attendance records).
+
+    Returns (deleted, error, media_paths) where media_paths are the photo/QR
+    files that belonged to the student so the caller can remove them.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('SELECT photo, qr_code FROM students WHERE id = ?', (student_id,))
+        student = cursor.fetchone()
+        if not student:
+            return False, "Student not found", []
+        
+        cursor.execute('DELETE FROM students WHERE id = ?', (student_id,))
+        conn.commit()
+        media_paths = [path for path in (student["photo"], student["qr_code"]) if path]
+        return True, None, media_paths
+    except Exception as e:
+        conn.rollback()
+        return False, str(e), []
+    finally:
+        conn.close()
+
+def get_referenced_media(paths):
+    """Return the subset of the given media paths still referenced by a student"""
+    if not paths:
+        return set()
+    
+    placeholders = ", ".join("?" for _ in paths)
+    with read_connection() as conn:
+        cursor = conn.execute(f'''
+            SELECT photo AS path FROM students WHERE photo IN ({placeholders})
+            UNION
+            SELECT qr_code AS path FROM students WHERE qr_code IN ({placeholders})
+        ''', list(paths) + list(paths))
+        referenced = {row["path"] for row in cursor.fetchall()}
+    
+    return referenced
+
+def delete_orphaned_attendance():
+    """Delete attendance rows whose student no longer exists; returns the count"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        DELETE FROM attendance
+        WHERE student_id NOT IN (SELECT id FROM students)
+    ''')
+    deleted = cursor.rowcount
+    conn.commit()
+    conn.close()
+    
+    return deleted
+
 def get_student(student_id):
     """Get student information by ID"""
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    cursor.execute('SELECT * FROM students WHERE id = ?', (student_id,))
+    cursor.execute('SELECT * FROM student_details WHERE id = ?', (student_id,))
     student = cursor.fetchone()
     conn.close()
     
     return dict(student) if student else None
 
 import pytz
-from datetime import datetime
 
-def record_attendance(student_id):
-    """Record attendance for a student"""
+def resolve_scan_time(scanned_at=None):
+    """Time a scan counts at, in PH time: now, or scanned_at for scans a
+    kiosk queued while offline.
+
+    scanned_at is an ISO 8601 timestamp with timezone and must be within
+    OFFLINE_SCAN_MAX_AGE. Returns (datetime, None) or (None, error message).
+    """
+    ph_tz = pytz.timezone("Asia/Manila")
+    ph_time = datetime.now(ph_tz)
+    if scanned_at:
+        try:
+            scanned = datetime.fromisoformat(scanned_at)
+        except (TypeError, ValueError):
+            return None, "scanned_at must be an ISO 8601 timestamp"
+        if scanned.tzinfo is None:
+            return None, "scanned_at must include a timezone"
+        if not (ph_time - OFFLINE_SCAN_MAX_AGE <= scanned <= ph_time + SCAN_CLOCK_SKEW):
+            return None, "Scan time is too far from the server time"
+        ph_time = min(scanned, ph_time).astimezone(ph_tz)
+    return ph_time, None
+
+def record_attendance(student_id, ph_time=None):
+    """Record attendance for a student at ph_time (from resolve_scan_time; default now)"""
+    if ph_time is None:
+        ph_time, _ = resolve_scan_time()
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
@@ -136,8 +697,6 @@ def record_attendance(student_id):
         conn.close()
         return None, "Student not found"
     
-    # Get current date and time in PH timezone
-    ph_time = datetime.now(pytz.timezone("Asia/Manila"))
     date = ph_time.strftime("%Y-%m-%d")
     time_in = ph_time.strftime("%I:%M %p")
     
@@ -172,66 +731,501 @@ def record_attendance(student_id):
     }, "Attendance recorded successfully"
 
 
-def get_attendance_by_date(date):
+def get_attendance_by_date(date, time_limit=None):
     """Get all attendance records for a specific date"""
+    with read_connection(time_limit) as conn:
+        cursor = conn.execute('''
+            SELECT 
+                a.id,
+                s.id as student_id,
+                s.lastname as last,
+                s.firstname as first,
+                s.course,
+                s.level,
+                a.time_in
+            FROM attendance a
+            JOIN student_details s ON a.student_id = s.id
+            WHERE a.date = ?
+            ORDER BY {TIME_IN_MINUTES}
+        '''.format(TIME_IN_MINUTES=TIME_IN_MINUTES), (date,))
+        records = cursor.fetchall()
+    
+    return [dict(record) for record in records]
+
+def iter_attendance_by_date(date, time_limit=None):
+    """Lazily yield AttendanceListRow tuples for a date, earliest time-in first"""
+    with read_connection(time_limit) as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = lambda _, row: AttendanceListRow._make(row)
+        cursor.execute('''
+            SELECT a.id, s.id, s.lastname, s.firstname, s.course, s.level, a.time_in
+            FROM attendance a
+            JOIN student_details s ON a.student_id = s.id
+            WHERE a.date = ?
+            ORDER BY {TIME_IN_MINUTES}
+        '''.format(TIME_IN_MINUTES=TIME_IN_MINUTES), (date,))
+        yield from cursor
+
+def get_all_attendance(time_limit=None):
+    """Get all attendance records"""
+    with read_connection(time_limit) as conn:
+        cursor = conn.execute('''
+            SELECT 
+                a.id,
+                s.id as student_id,
+                s.lastname as last,
+                s.firstname as first,
+                s.course,
+                s.level,
+                a.date,
+                a.time_in
+            FROM attendance a
+            JOIN student_details s ON a.student_id = s.id
+            ORDER BY a.date DESC, a.time_in DESC
+        ''')
+        records = cursor.fetchall()
+    
+    return [dict(record) for record in records]
+
+def get_attendance_summary(start_date, end_date, time_limit=None):
+    """Count attendance per course/level between two dates (inclusive)"""
+    with read_connection(time_limit) as conn:
+        rows = conn.execute('''
+            SELECT c.code AS course, l.name AS level,
+                   COUNT(*) AS records, COUNT(DISTINCT a.student_id) AS students
+            FROM attendance a
+            JOIN students s ON s.id = a.student_id
+            JOIN courses c ON c.id = s.course_id
+            JOIN levels l ON l.id = s.level_id
+            WHERE a.date BETWEEN ? AND ?
+            GROUP BY s.course_id, s.level_id
+            ORDER BY c.code, l.name
+        ''', (start_date, end_date)).fetchall()
+    
+    return [dict(row) for row in rows]
+
+def _attendance_filter(ids=None, start_date=None, end_date=None, course=None, level=None):
+    """Build a WHERE clause (and params) selecting attendance rows for bulk operations"""
+    clauses = []
+    params = []
+    
+    if ids:
+        clauses.append(f"id IN ({', '.join('?' for _ in ids)})")
+        params.extend(int(i) for i in ids)
+    if start_date:
+        clauses.append("date >= ?")
+        params.append(start_date)
+    if end_date:
+        clauses.append("date <= ?")
+        params.append(end_date)
+    if course or level:
+        course_id, level_id = _dimension_ids(course, level)
+        student_clauses = []
+        if course_id is not None:
+            student_clauses.append("course_id = ?")
+            params.append(course_id)
+        if level_id is not None:
+            student_clauses.append("level_id = ?")
+            params.append(level_id)
+        clauses.append(
+            f"student_id IN (SELECT id FROM students WHERE {' AND '.join(student_clauses)})"
+        )
+    
+    return " AND ".join(clauses), params
+
+def bulk_delete_attendance(ids=None, start_date=None, end_date=None, course=None, level=None, dry_run=False):
+    """Delete every attendance record matching the filters in one transaction.
+
+    Returns ({'matched': n, 'deleted': n}, None) or (None, error message).
+    With dry_run the matching rows are only counted.
+    """
+    where, params = _attendance_filter(ids, start_date, end_date, course, level)
+    if not where:
+        return None, "At least one filter is required"
+    
     conn = get_db_connection()
     cursor = conn.cursor()
     
+    try:
+        cursor.execute(f'SELECT COUNT(*) FROM attendance WHERE {where}', params)
+        matched = cursor.fetchone()[0]
+        deleted = 0
+        if not dry_run:
+            cursor.execute(f'DELETE FROM attendance WHERE {where}', params)
+            deleted = cursor.rowcount
+        conn.commit()
+        return {'matched': matched, 'deleted': deleted}, None
+    except Exception as e:
+        conn.rollback()
+        return None, str(e)
+    finally:
+        conn.close()
+
+def bulk_redate_attendance(new_date, ids=None, start_date=None, end_date=None, course=None, level=None, dry_run=False):
+    """Move every attendance record matching the filters to new_date in one transaction.
+
+    A student may only have one record per day, so rows that would collide
+    with an existing record on new_date (or with another moved row of the
+    same student) are skipped and reported.
+    Returns ({'matched': n, 'updated': n, 'skipped': n, 'updated_ids': [...]}, None)
+    or (None, error message).
+    """
+    try:
+        datetime.strptime(new_date or "", "%Y-%m-%d")
+    except ValueError:
+        return None, "new_date must be in YYYY-MM-DD format"
+    
+    where, params = _attendance_filter(ids, start_date, end_date, course, level)
+    if not where:
+        return None, "At least one filter is required"
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(f'SELECT id, student_id FROM attendance WHERE {where} ORDER BY id', params)
+        rows = cursor.fetchall()
+        
+        cursor.execute('SELECT DISTINCT student_id FROM attendance WHERE date = ?', (new_date,))
+        taken = {row["student_id"] for row in cursor.fetchall()}
+        
+        to_update = []
+        for row in rows:
+            if row["student_id"] in taken:
+                continue
+            taken.add(row["student_id"])
+            to_update.append((new_date, row["id"]))
+        
+        if not dry_run:
+            cursor.executemany('UPDATE attendance SET date = ? WHERE id = ?', to_update)
+        conn.commit()
+        return {
+            'matched': len(rows),
+            'updated': 0 if dry_run else len(to_update),
+            'skipped': len(rows) - len(to_update),
+            'updated_ids': [] if dry_run else [row_id for _, row_id in to_update]
+        }, None
+    except Exception as e:
+        conn.rollback()
+        return None, str(e)
+    finally:
+        conn.close()
+
+def get_all_students(time_limit=None):
+    """Get all students from the database"""
+    with read_connection(time_limit) as conn:
+        students = conn.execute('SELECT * FROM student_details ORDER BY id').fetchall()
+    
+    return [dict(student) for student in students]
+
+def iter_students(time_limit=None):
+    """Lazily yield StudentListRow tuples ordered by id"""
+    with read_connection(time_limit) as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = lambda _, row: StudentListRow._make(row)
+        cursor.execute('SELECT id, lastname, firstname, course, level FROM student_details ORDER BY id')
+        yield from cursor
+
+def get_roster(since=None):
+    """Get the kiosk roster: every student, or with `since` only the changes after that version.
+
+    Returns {'version': n, 'students': [RosterRow, ...], 'deleted': [id, ...]}.
+    Both come from one read snapshot, so `version` matches the rows.
+    """
+    with read_connection() as conn:
+        conn.execute("BEGIN")
+        version = conn.execute('SELECT COALESCE(MAX(version), 0) FROM roster_changes').fetchone()[0]
+        
+        cursor = conn.cursor()
+        cursor.row_factory = lambda _, row: RosterRow._make(row)
+        if since is None:
+            cursor.execute('''
+                SELECT s.id, s.lastname, s.firstname, s.course, s.level, s.photo, r.version
+                FROM student_details s
+                JOIN roster_changes r ON r.student_id = s.id
+                ORDER BY s.id
+            ''')
+            deleted = []
+        else:
+            cursor.execute('''
+                SELECT s.id, s.lastname, s.firstname, s.course, s.level, s.photo, r.version
+                FROM roster_changes r
+                JOIN student_details s ON s.id = r.student_id
+                WHERE r.version > ? AND r.deleted = 0
+                ORDER BY r.version
+            ''', (since,))
+            deleted = [row[0] for row in conn.execute(
+                'SELECT student_id FROM roster_changes WHERE version > ? AND deleted = 1', (since,)
+            )]
+        students = cursor.fetchall()
+    
+    return {'version': version, 'students': students, 'deleted': deleted}
+
+def get_students_for_cards(student_ids=None, course=None, level=None):
+    """Get the students to print ID cards for, by id list and/or course/level"""
+    clauses = []
+    params = []
+    if student_ids:
+        clauses.append(f"id IN ({', '.join('?' for _ in student_ids)})")
+        params.extend(student_ids)
+    course_id, level_id = _dimension_ids(course, level)
+    if course_id is not None:
+        clauses.append("course_id = ?")
+        params.append(course_id)
+    if level_id is not None:
+        clauses.append("level_id = ?")
+        params.append(level_id)
+    if not clauses:
+        return []
+    
+    with read_connection() as conn:
+        students = conn.execute(f'''
+            SELECT id, lastname, firstname, course, level, photo
+            FROM student_details
+            WHERE {' AND '.join(clauses)}
+            ORDER BY lastname, firstname
+        ''', params).fetchall()
+    
+    return [dict(student) for student in students]
+
+def _student_filter(ids=None, course=None, level=None):
+    """Build a WHERE clause (and params) selecting students for bulk operations"""
+    clauses = []
+    params = []
+    
+    if ids:
+        clauses.append(f"id IN ({', '.join('?' for _ in ids)})")
+        params.extend(ids)
+    course_id, level_id = _dimension_ids(course, level)
+    if course_id is not None:
+        clauses.append("course_id = ?")
+        params.append(course_id)
+    if level_id is not None:
+        clauses.append("level_id = ?")
+        params.append(level_id)
+    
+    return " AND ".join(clauses), params
+
+def _apply_student_batch(cursor, operation, description, where, params,
+                         new_course_sql, new_level_sql, new_params, dry_run):
+    """Move the students matching `where` to new course/level keys in one statement.
+    
+    new_course_sql/new_level_sql are SQL expressions over the students row.
+    Students that would not change are left out. Unless dry_run, the old and
+    new keys are saved under a new student_batches row so the operation can be
+    undone. The caller commits (or rolls back).
+    """
+    plan = f'''
+        SELECT * FROM (
+            SELECT id, course_id, level_id,
+                   {new_course_sql} AS new_course_id, {new_level_sql} AS new_level_id
+            FROM students
+            WHERE {where or '1'}
+        )
+        WHERE new_course_id != course_id OR new_level_id != level_id
+    '''
+    plan_params = list(new_params) + list(params)
+    
+    cursor.execute(f'''
+        SELECT oc.code || '-' || ol.name AS from_group,
+               nc.code || '-' || nl.name AS to_group,
+               COUNT(*) AS students
+        FROM ({plan}) p
+        JOIN courses oc ON oc.id = p.course_id
+        JOIN levels ol ON ol.id = p.level_id
+        JOIN courses nc ON nc.id = p.new_course_id
+        JOIN levels nl ON nl.id = p.new_level_id
+        GROUP BY p.course_id, p.level_id, p.new_course_id, p.new_level_id
+        ORDER BY from_group
+    ''', plan_params)
+    changes = [dict(row) for row in cursor.fetchall()]
+    matched = sum(change['students'] for change in changes)
+    
+    if dry_run or not matched:
+        return {'batch_id': None, 'matched': matched, 'updated': 0, 'changes': changes}
+    
     cursor.execute('''
-        SELECT 
-            a.id,
-            s.id as student_id,
-            s.lastname as last,
-            s.firstname as first,
-            s.course,
-            s.level,
-            a.time_in
-        FROM attendance a
-        JOIN students s ON a.student_id = s.id
-        WHERE a.date = ?
-        ORDER BY a.time_in
-    ''', (date,))
-    
-    records = cursor.fetchall()
-    conn.close()
+        INSERT INTO student_batches (operation, description, student_count, created_at)
+        VALUES (?, ?, ?, ?)
+    ''', (operation, description, matched, datetime.now().isoformat(timespec="seconds")))
+    batch_id = cursor.lastrowid
+    cursor.execute(f'''
+        INSERT INTO student_batch_changes
+            (batch_id, student_id, old_course_id, old_level_id, new_course_id, new_level_id)
+        SELECT ?, id, course_id, level_id, new_course_id, new_level_id FROM ({plan})
+    ''', [batch_id] + plan_params)
+    cursor.execute('''
+        UPDATE students
+        SET course_id = ch.new_course_id, level_id = ch.new_level_id
+        FROM student_batch_changes ch
+        WHERE ch.batch_id = ? AND ch.student_id = students.id
+    ''', (batch_id,))
     
-    return [dict(record) for record in records]
+    return {'batch_id': batch_id, 'matched': matched, 'updated': cursor.rowcount, 'changes': changes}
 
-def get_all_attendance():
-    """Get all attendance records"""
+def _run_student_batch(operation, description, build, dry_run):
+    """Run one bulk student operation in a transaction.
+    
+    `build(cursor)` returns (where, params, new_course_sql, new_level_sql,
+    new_params). Dry runs are rolled back, so nothing they add (such as a new
+    level) is kept. Returns (result, None) or (None, error message).
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    cursor.execute('''
-        SELECT 
-            a.id,
-            s.id as student_id,
-            s.lastname as last,
-            s.firstname as first,
-            s.course,
-            s.level,
-            a.date,
-            a.time_in
-        FROM attendance a
-        JOIN students s ON a.student_id = s.id
-        ORDER BY a.date DESC, a.time_in DESC
-    ''')
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        result = _apply_student_batch(cursor, operation, description, *build(cursor), dry_run)
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+        return result, None
+    except Exception as e:
+        conn.rollback()
+        return None, str(e)
+    finally:
+        conn.close()
+
+def promote_students(course=None, level=None, graduate=False, dry_run=False):
+    """Move students up one level, optionally only one course and/or level.
     
-    records = cursor.fetchall()
-    conn.close()
+    Numbered levels below FINAL_LEVEL go up by one. Students on FINAL_LEVEL
+    stay put unless graduate is set, in which case they move to
+    GRADUATED_LEVEL. Returns ({'batch_id', 'matched', 'updated', 'changes'},
+    None) or (None, error message).
+    """
+    try:
+        final = int(FINAL_LEVEL)
+    except ValueError:
+        return None, f"FINAL_LEVEL must be a number, not {FINAL_LEVEL!r}"
     
-    return [dict(record) for record in records]
+    def build(cursor):
+        where, params = _student_filter(course=course, level=level)
+        numbered = [
+            (row["id"], int(row["name"]))
+            for row in cursor.execute('SELECT id, name FROM levels')
+            if row["name"].isdigit()
+        ]
+        mapping = []
+        for level_id, number in numbered:
+            if number < final:
+                mapping.append((level_id, _level_id_for_write(cursor, number + 1)))
+            elif number == final and graduate:
+                mapping.append((level_id, _level_id_for_write(cursor, GRADUATED_LEVEL)))
+        if not mapping:
+            return where, params, "course_id", "level_id", []
+    
+        new_level_sql = f"CASE level_id {' '.join('WHEN ? THEN ?' for _ in mapping)} ELSE level_id END"
+        new_params = [value for pair in mapping for value in pair]
+        return where, params, "course_id", new_level_sql, new_params
+    
+    scope = " ".join(filter(None, [course, f"level {level}" if level else None])) or "all students"
+    description = f"Promote {scope}" + (f" (graduating level {FINAL_LEVEL})" if graduate else "")
+    return _run_student_batch("promote", description, build, dry_run)
 
-def get_all_students():
-    """Get all students from the database"""
+def graduate_students(ids=None, course=None, level=None, archive=False, dry_run=False):
+    """Move students to GRADUATED_LEVEL (or ARCHIVED_LEVEL with archive).
+    
+    Without ids or a level, the students on FINAL_LEVEL are selected.
+    Returns the same shape as promote_students.
+    """
+    if not ids and not level:
+        level = FINAL_LEVEL
+    target = ARCHIVED_LEVEL if archive else GRADUATED_LEVEL
+    
+    def build(cursor):
+        where, params = _student_filter(ids, course, level)
+        target_id = _level_id_for_write(cursor, target)
+        return where, params, "course_id", "?", [target_id]
+    
+    scope = " ".join(filter(None, [course, f"level {level}" if level else None,
+                                   f"{len(ids)} selected" if ids else None]))
+    operation = "archive" if archive else "graduate"
+    return _run_student_batch(operation, f"{operation.title()} {scope}", build, dry_run)
+
+def transfer_students(new_course, ids=None, course=None, level=None, dry_run=False):
+    """Move the selected students to another course, keeping their level.
+    
+    Returns the same shape as promote_students.
+    """
+    new_course = (new_course or "").strip()
+    if not new_course:
+        return None, "new_course is required"
+    if not (ids or course or level):
+        return None, "At least one filter is required"
+    
+    def build(cursor):
+        where, params = _student_filter(ids, course, level)
+        new_course_id = _course_id_for_write(cursor, new_course)
+        return where, params, "?", "level_id", [new_course_id]
+    
+    scope = " ".join(filter(None, [course, f"level {level}" if level else None,
+                                   f"{len(ids)} selected" if ids else None]))
+    return _run_student_batch("transfer", f"Transfer {scope} to {new_course}", build, dry_run)
+
+def list_student_batches(limit=50):
+    """Get the most recent bulk student operations, newest first"""
+    with read_connection() as conn:
+        batches = conn.execute(
+            'SELECT * FROM student_batches ORDER BY id DESC LIMIT ?', (limit,)
+        ).fetchall()
+    
+    return [dict(batch) for batch in batches]
+
+def undo_student_batch(batch_id, dry_run=False):
+    """Put the students of a bulk operation back on their old course/level.
+    
+    Students deleted or changed again since the operation are skipped.
+    Returns ({'matched': n, 'restored': n, 'skipped': n}, None) or
+    (None, error message).
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    cursor.execute('SELECT * FROM students ORDER BY id')
-    students = cursor.fetchall()
-    conn.close()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute('SELECT undone_at FROM student_batches WHERE id = ?', (batch_id,))
+        batch = cursor.fetchone()
+        if batch is None:
+            conn.rollback()
+            return None, "Batch not found"
+        if batch["undone_at"]:
+            conn.rollback()
+            return None, f"Batch was already undone at {batch['undone_at']}"
     
-    return [dict(student) for student in students]
+        cursor.execute('SELECT COUNT(*) FROM student_batch_changes WHERE batch_id = ?', (batch_id,))
+        matched = cursor.fetchone()[0]
+        unchanged_since = '''
+            ch.batch_id = ? AND ch.student_id = students.id
+            AND students.course_id = ch.new_course_id AND students.level_id = ch.new_level_id
+        '''
+        if dry_run:
+            cursor.execute(f'''
+                SELECT COUNT(*) FROM students JOIN student_batch_changes ch
+                ON {unchanged_since}
+            ''', (batch_id,))
+            restored = cursor.fetchone()[0]
+            conn.rollback()
+        else:
+            cursor.execute(f'''
+                UPDATE students
+                SET course_id = ch.old_course_id, level_id = ch.old_level_id
+                FROM student_batch_changes ch
+                WHERE {unchanged_since}
+            ''', (batch_id,))
+            restored = cursor.rowcount
+            cursor.execute(
+                'UPDATE student_batches SET undone_at = ? WHERE id = ?',
+                (datetime.now().isoformat(timespec="seconds"), batch_id)
+            )
+            conn.commit()
+        return {'matched': matched, 'restored': restored, 'skipped': matched - restored}, None
+    except Exception as e:
+        conn.rollback()
+        return None, str(e)
+    finally:
+        conn.close()
 
 def verify_admin(email, password):
     """Verify admin login credentials"""
@@ -266,12 +1260,8 @@ def add_admin(email, password, name):
 
 def get_all_admins():
     """Get all admin users"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM admin ORDER BY id')
-    admins = cursor.fetchall()
-    conn.close()
+    with read_connection() as conn:
+        admins = conn.execute('SELECT * FROM admin ORDER BY id').fetchall()
     
     return [dict(admin) for admin in admins]
 
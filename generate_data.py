@@ -0,0 +1,124 @@
+"""Generate a large synthetic attendance database for sizing and benchmarks.
+
+    python generate_data.py --students 50000 --years 3 --db bench.db
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+import database  # type: ignore
+
+FIRST_NAMES = [
+    "Juan", "Maria", "Jose", "Ana", "Mark", "Angel", "John", "Kristine", "Paul", "Jasmine",
+    "Carlo", "Nicole", "Miguel", "Andrea", "Rafael", "Camille", "Gabriel", "Patricia", "Joshua", "Bea",
+    "Christian", "Sofia", "Daniel", "Althea", "Ronan", "Govan", "Dennis", "Cedrick", "Ivy", "Kyla",
+]
+LAST_NAMES = [
+    "Dela Cruz", "Santos", "Reyes", "Garcia", "Mendoza", "Torres", "Flores", "Gonzales", "Bautista",
+    "Villanueva", "Ramos", "Aquino", "Castillo", "Rivera", "Navarro", "Fernandez", "Lopez", "Cruz",
+    "Antoque", "Badilles", "Durano", "Libradilla", "Tan", "Lim", "Ocampo", "Pascual", "Soriano",
+]
+# Course -> relative enrollment weight
+COURSES = {
+    "BSIT": 30, "BSCS": 12, "BSCPE": 10, "BSCRIM": 18, "BSED": 14, "BSBA": 16, "BSN": 8, "BSHM": 10,
+}
+# Later years have fewer students (dropouts/shifters)
+LEVEL_WEIGHTS = {"1": 34, "2": 27, "3": 22, "4": 17}
+
+# School year runs from mid-August to the end of May with a Christmas break
+CHRISTMAS_BREAK = ((12, 18), (1, 3))
+
+
+def school_days(years, end=None):
+    """Yield the weekday school days of the last `years` school years"""
+    end = end or date.today()
+    start = date(end.year - years, 8, 15)
+    day = start
+    while day <= end:
+        in_term = not (6 <= day.month <= 7 or (day.month == 8 and day.day < 15))
+        in_break = (day.month, day.day) >= CHRISTMAS_BREAK[0] or (day.month, day.day) <= CHRISTMAS_BREAK[1]
+        if day.weekday() < 5 and in_term and not in_break:
+            yield day.isoformat()
+        day += timedelta(days=1)
+
+
+def make_students(count, rng, start_id=1):
+    """Return student rows in the shape database.bulk_load expects"""
+    width = max(4, len(str(start_id + count - 1)))
+    courses = list(COURSES)
+    course_weights = list(COURSES.values())
+    levels = list(LEVEL_WEIGHTS)
+    level_weights = list(LEVEL_WEIGHTS.values())
+    return [
+        (
+            f"{start_id + i:0{width}d}",
+            rng.choice(LAST_NAMES),
+            rng.choice(FIRST_NAMES),
+            rng.choices(courses, course_weights)[0],
+            rng.choices(levels, level_weights)[0],
+            None,
+            None,
+        )
+        for i in range(count)
+    ]
+
+
+def make_attendance(student_ids, days, rng, attendance_rate=0.9):
+    """Lazily yield (student_id, date, time_in) rows.
+
+    Each student has a habitual arrival time around 7:45 AM; daily arrivals
+    scatter around it, with the occasional very late arrival.
+    """
+    # "HH:MM AM" labels for every minute of the day, formatted once
+    labels = [f"{(m // 60 - 1) % 12 + 1:02d}:{m % 60:02d} {'AM' if m < 720 else 'PM'}" for m in range(1440)]
+    habits = [(sid, rng.gauss(465, 12)) for sid in student_ids]   # minutes after midnight
+    random_, gauss = rng.random, rng.gauss
+    for day in days:
+        for sid, habit in habits:
+            if random_() > attendance_rate:
+                continue
+            minutes = gauss(habit, 6)
+            if random_() < 0.03:
+                minutes += rng.expovariate(1 / 45)
+            minutes = int(min(max(minutes, 390), 630))     # 6:30 AM .. 10:30 AM
+            yield sid, day, labels[minutes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic attendance dataset")
+    parser.add_argument("--db", default=database.DB_NAME, help="database file (default: %(default)s)")
+    parser.add_argument("--students", type=int, default=50000)
+    parser.add_argument("--years", type=int, default=3, help="school years of attendance history")
+    parser.add_argument("--attendance-rate", type=float, default=0.9)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    database.DB_NAME = args.db
+    database.init_db()
+
+    conn = database.get_db_connection()
+    start_id = conn.execute(
+        "SELECT COALESCE(MAX(CAST(id AS INTEGER)), 0) + 1 FROM students"
+    ).fetchone()[0]
+    conn.close()
+
+    rng = random.Random(args.seed)
+    started = time.time()
+    students = make_students(args.students, rng, start_id)
+    days = list(school_days(args.years))
+    attendance = make_attendance([s[0] for s in students], days, rng, args.attendance_rate)
+
+    result, error = database.bulk_load(students, attendance)
+    if error:
+        raise SystemExit(f"Load failed: {error}")
+
+    elapsed = time.time() - started
+    total = result["students"] + result["attendance"]
+    print(f"Loaded {result['students']} students and {result['attendance']} attendance rows "
+          f"over {len(days)} school days into {args.db} in {elapsed:.1f}s "
+          f"({total / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
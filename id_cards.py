@@ -0,0 +1,321 @@
+import hashlib
+import io
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+import database  # type: ignore
+
+CARD_CACHE_DIR = os.path.join(database.APP_DIR, "card_cache")
+PRINT_JOB_DIR = os.path.join(database.APP_DIR, "print_jobs")
+CARD_WORKERS = int(os.environ.get("CARD_WORKERS", str(os.cpu_count() or 2)))
+
+# Bump when the card layout changes so cached cards are re-rendered
+LAYOUT_VERSION = "1"
+
+# Everything is drawn at 300 DPI; a card is CR80 size (85.6 x 54 mm)
+DPI = 300
+CARD_SIZE = (1011, 638)
+# Page size in pixels and in PDF points, and the card grid (cols, rows)
+PAGE_SIZES = {
+    "A4": {"pixels": (2480, 3508), "points": (595.28, 841.89), "grid": (2, 5)},
+    "Letter": {"pixels": (2550, 3300), "points": (612, 792), "grid": (2, 5)},
+}
+
+# Rendered cards kept in CARD_CACHE_DIR; least recently used are pruned first
+MAX_CACHED_CARDS = int(os.environ.get("MAX_CACHED_CARDS", "5000"))
+
+# Most recent jobs, newest last: job_id -> status dict. Finished jobs beyond
+# MAX_JOBS are dropped along with their PDFs; running jobs are never dropped
+MAX_JOBS = 50
+jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+_executor = None
+
+
+def _font(size, bold=False):
+    from PIL import ImageFont
+    try:
+        return ImageFont.truetype("DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf", size)
+    except OSError:
+        return ImageFont.load_default(size)
+
+
+def _fit_text(draw, text, font, width):
+    """Trim text with an ellipsis until it fits in `width` pixels"""
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(text + "…", font=font) > width:
+        text = text[:-1]
+    return text + "…"
+
+
+def _card_hash(card):
+    """Content hash of everything that appears on the card"""
+    digest = hashlib.sha1(LAYOUT_VERSION.encode())
+    for key in ("id", "name", "course_level"):
+        digest.update(f"{key}={card[key]}\0".encode())
+    photo = card.get("photo")
+    if photo and os.path.exists(photo):
+        with open(photo, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def render_card(card):
+    """Render one ID card to the cache (runs in a pool worker); returns its path"""
+    from PIL import Image, ImageDraw, ImageOps
+    import qrcode  # type: ignore
+
+    path = os.path.join(CARD_CACHE_DIR, f"{_card_hash(card)}.png")
+    if os.path.exists(path):
+        # Mark as recently used so _prune_card_cache keeps it
+        os.utime(path)
+        return path
+
+    width, height = CARD_SIZE
+    img = Image.new("RGB", CARD_SIZE, "white")
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, width, 90), fill="#667eea")
+    draw.text((40, 22), "STUDENT ID", font=_font(40, bold=True), fill="white")
+    draw.rectangle((0, 0, width - 1, height - 1), outline="#2d3748", width=3)
+
+    photo_box = (40, 120, 340, 520)
+    photo = card.get("photo")
+    if photo and os.path.exists(photo):
+        with Image.open(photo) as src:
+            face = ImageOps.fit(src.convert("RGB"), (photo_box[2] - photo_box[0], photo_box[3] - photo_box[1]))
+        img.paste(face, photo_box[:2])
+    else:
+        draw.rectangle(photo_box, fill="#e2e8f0")
+    draw.rectangle(photo_box, outline="#a0aec0", width=2)
+
+    text_x, text_width = 370, 600
+    draw.text((text_x, 140), _fit_text(draw, card["name"], _font(42, bold=True), text_width),
+              font=_font(42, bold=True), fill="#2d3748")
+    draw.text((text_x, 215), _fit_text(draw, card["course_level"], _font(34), text_width),
+              font=_font(34), fill="#4a5568")
+    draw.text((text_x, 270), f"ID: {card['id']}", font=_font(34), fill="#4a5568")
+
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=2)
+    qr.add_data(card["id"])
+    qr.make(fit=True)
+    qr_img = qr.make_image(fill_color="black", back_color="white").get_image().convert("RGB")
+    img.paste(qr_img.resize((250, 250), Image.NEAREST), (width - 290, height - 290))
+
+    # Write atomically so a concurrent job never reads a half-written card
+    os.makedirs(CARD_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    img.save(tmp_path, "PNG")
+    os.replace(tmp_path, path)
+    return path
+
+
+def render_sheet(card_paths, page_size):
+    """Lay cards out on one page (runs in a pool worker); returns JPEG bytes"""
+    from PIL import Image
+
+    layout = PAGE_SIZES[page_size]
+    page_w, page_h = layout["pixels"]
+    cols, rows = layout["grid"]
+    card_w, card_h = CARD_SIZE
+    gap = 30
+    left = (page_w - cols * card_w - (cols - 1) * gap) // 2
+    top = (page_h - rows * card_h - (rows - 1) * gap) // 2
+
+    page = Image.new("RGB", (page_w, page_h), "white")
+    for index, card_path in enumerate(card_paths):
+        row, col = divmod(index, cols)
+        with Image.open(card_path) as card:
+            page.paste(card, (left + col * (card_w + gap), top + row * (card_h + gap)))
+
+    out = io.BytesIO()
+    page.save(out, "JPEG", quality=90, dpi=(DPI, DPI))
+    return page_w, page_h, out.getvalue()
+
+
+class _PdfWriter:
+    """Minimal PDF writer: one full-page JPEG per page, streamed to disk"""
+
+    def __init__(self, path, page_points):
+        self.f = open(path, "wb")
+        self.page_points = page_points
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 3    # 1 = catalog, 2 = page tree
+        self.f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+    def _obj(self, obj_id, body, stream=None):
+        self.offsets[obj_id] = self.f.tell()
+        self.f.write(f"{obj_id} 0 obj\n".encode() + body)
+        if stream is not None:
+            self.f.write(b"\nstream\n" + stream + b"\nendstream")
+        self.f.write(b"\nendobj\n")
+
+    def add_page(self, width_px, height_px, jpeg):
+        image_id, content_id, page_id = self.next_id, self.next_id + 1, self.next_id + 2
+        self.next_id += 3
+        pw, ph = self.page_points
+        self._obj(image_id, (
+            f"<< /Type /XObject /Subtype /Image /Width {width_px} /Height {height_px} "
+            f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /DCTDecode /Length {len(jpeg)} >>"
+        ).encode(), jpeg)
+        content = f"q {pw} 0 0 {ph} 0 0 cm /Im0 Do Q".encode()
+        self._obj(content_id, f"<< /Length {len(content)} >>".encode(), content)
+        self._obj(page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {pw} {ph}] "
+            f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode())
+        self.page_ids.append(page_id)
+
+    def close(self):
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self._obj(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode())
+        xref = self.f.tell()
+        self.f.write(f"xref\n0 {self.next_id}\n0000000000 65535 f \n".encode())
+        for obj_id in range(1, self.next_id):
+            self.f.write(f"{self.offsets[obj_id]:010d} 00000 n \n".encode())
+        self.f.write(f"trailer\n<< /Size {self.next_id} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+        self.f.close()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # Imported on first use so the web app starts without loading multiprocessing
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        
+        # spawn: the web process has background threads, which fork() would copy badly
+        _executor = ProcessPoolExecutor(max_workers=CARD_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def _update_job(job_id, **fields):
+    with _jobs_lock:
+        job = jobs.get(job_id)
+        if job:
+            job.update(fields)
+
+
+def _evict_jobs():
+    """Drop the oldest finished jobs beyond MAX_JOBS and delete their PDFs (call with _jobs_lock held)"""
+    finished = [job_id for job_id, job in jobs.items() if job["status"] != "running"]
+    for job_id in finished[:max(0, len(jobs) - MAX_JOBS)]:
+        del jobs[job_id]
+        pdf_path = os.path.join(PRINT_JOB_DIR, f"{job_id}.pdf")
+        if os.path.exists(pdf_path):
+            os.remove(pdf_path)
+
+
+def _prune_files():
+    """Delete PDFs of jobs no longer tracked and the least recently used cards beyond MAX_CACHED_CARDS"""
+    with _jobs_lock:
+        _evict_jobs()
+        known = set(jobs)
+        busy = any(job["status"] == "running" for job in jobs.values())
+
+    if os.path.isdir(PRINT_JOB_DIR):
+        for name in os.listdir(PRINT_JOB_DIR):
+            if name.endswith(".pdf") and name[:-4] not in known:
+                os.remove(os.path.join(PRINT_JOB_DIR, name))
+
+    # A running job may still need any cached card, so only prune when idle
+    if busy or not os.path.isdir(CARD_CACHE_DIR):
+        return
+    cards = [entry for entry in os.scandir(CARD_CACHE_DIR) if entry.name.endswith(".png")]
+    if len(cards) <= MAX_CACHED_CARDS:
+        return
+    cards.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in cards[:len(cards) - MAX_CACHED_CARDS]:
+        os.remove(entry.path)
+
+
+def _run_job(job_id, students, page_size):
+    global _executor
+    from concurrent.futures.process import BrokenProcessPool
+    
+    try:
+        executor = _get_executor()
+        cards = [{
+            "id": s["id"],
+            "name": f"{s['lastname']}, {s['firstname']}",
+            "course_level": f"{s['course']}-{s['level']}",
+            "photo": database.media_file(s["photo"]),
+        } for s in students]
+
+        card_paths = []
+        for path in executor.map(render_card, cards, chunksize=8):
+            card_paths.append(path)
+            _update_job(job_id, cards_done=len(card_paths))
+
+        cols, rows = PAGE_SIZES[page_size]["grid"]
+        per_page = cols * rows
+        sheets = [card_paths[i:i + per_page] for i in range(0, len(card_paths), per_page)]
+
+        os.makedirs(PRINT_JOB_DIR, exist_ok=True)
+        pdf_path = os.path.join(PRINT_JOB_DIR, f"{job_id}.pdf")
+        writer = _PdfWriter(pdf_path, PAGE_SIZES[page_size]["points"])
+        try:
+            for done, sheet in enumerate(executor.map(render_sheet, sheets, [page_size] * len(sheets)), 1):
+                writer.add_page(*sheet)
+                _update_job(job_id, sheets_done=done)
+        finally:
+            writer.close()
+
+        _update_job(job_id, status="done", pdf_path=pdf_path,
+                    finished_at=datetime.now().isoformat(timespec="seconds"))
+    except BrokenProcessPool as e:
+        # A worker died; start a fresh pool for the next job
+        _executor = None
+        _update_job(job_id, status="failed", error=str(e))
+    except Exception as e:
+        _update_job(job_id, status="failed", error=str(e))
+    finally:
+        try:
+            _prune_files()
+        except OSError as e:
+            print(f"Print job cleanup failed: {e}")
+
+
+def start_print_job(student_ids=None, course=None, level=None, page_size="A4"):
+    """Queue an ID-card print job in the background.
+
+    Returns (job_id, None) or (None, error message).
+    """
+    if page_size not in PAGE_SIZES:
+        return None, f"page_size must be one of {', '.join(PAGE_SIZES)}"
+
+    students = database.get_students_for_cards(student_ids, course, level)
+    if not students:
+        return None, "No students match the selection"
+
+    cols, rows = PAGE_SIZES[page_size]["grid"]
+    job_id = uuid.uuid4().hex[:12]
+    with _jobs_lock:
+        jobs[job_id] = {
+            "job_id": job_id,
+            "status": "running",
+            "page_size": page_size,
+            "cards_total": len(students),
+            "cards_done": 0,
+            "sheets_total": -(-len(students) // (cols * rows)),
+            "sheets_done": 0,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        _evict_jobs()
+
+    threading.Thread(target=_run_job, args=(job_id, students, page_size),
+                     name=f"print-job-{job_id}", daemon=True).start()
+    return job_id, None
+
+
+def get_job(job_id):
+    """Return a copy of the job's status dict, or None"""
+    with _jobs_lock:
+        job = jobs.get(job_id)
+        return dict(job) if job else None
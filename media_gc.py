@@ -0,0 +1,130 @@
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+import database  # type: ignore
+
+# Directories holding per-student files, as stored in the students table
+# (relative to database.APP_DIR)
+MEDIA_DIRS = ("static/photos", "static/qr_codes")
+QUARANTINE_DIR = os.path.join(database.APP_DIR, "media_quarantine")
+
+# Files are checked against the database this many at a time
+BATCH_SIZE = 400
+
+# add_student_api writes the files before the students row exists, so
+# anything newer than this is left alone
+GRACE_SECONDS = 600
+
+_lock = threading.Lock()
+last_report = None
+
+
+def _batches(media_dir):
+    """Yield lists of (path, size, mtime) for the files in media_dir"""
+    batch = []
+    try:
+        entries = os.scandir(database.media_file(media_dir))
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            # Paths are stored with forward slashes, e.g. static/photos/0001_photo.png
+            batch.append((f"{media_dir}/{entry.name}", stat.st_size, stat.st_mtime))
+            if len(batch) >= BATCH_SIZE:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def collect_garbage(delete=False, dry_run=False):
+    """Remove or quarantine media files no student references any more.
+
+    Orphaned attendance rows are purged as well. Returns a report dict with
+    the number of files scanned/removed and the bytes reclaimed.
+    """
+    global last_report
+
+    with _lock:
+        started = time.time()
+        report = {
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'mode': 'dry-run' if dry_run else ('delete' if delete else 'quarantine'),
+            'scanned': 0,
+            'orphaned': 0,
+            'reclaimed_bytes': 0,
+            'orphaned_attendance': 0,
+            'errors': [],
+        }
+        cutoff = started - GRACE_SECONDS
+
+        for media_dir in MEDIA_DIRS:
+            for batch in _batches(media_dir):
+                report['scanned'] += len(batch)
+                referenced = database.get_referenced_media([path for path, _, _ in batch])
+
+                for path, size, mtime in batch:
+                    if path in referenced or mtime > cutoff:
+                        continue
+                    report['orphaned'] += 1
+                    if dry_run:
+                        report['reclaimed_bytes'] += size
+                        continue
+                    try:
+                        if delete:
+                            os.remove(database.media_file(path))
+                        else:
+                            target_dir = os.path.join(QUARANTINE_DIR, os.path.basename(media_dir))
+                            os.makedirs(target_dir, exist_ok=True)
+                            shutil.move(database.media_file(path), os.path.join(target_dir, os.path.basename(path)))
+                        report['reclaimed_bytes'] += size
+                    except OSError as e:
+                        report['errors'].append(f"{path}: {str(e)}")
+
+        if not dry_run:
+            report['orphaned_attendance'] = database.delete_orphaned_attendance()
+
+        report['duration_ms'] = round((time.time() - started) * 1000, 1)
+        last_report = report
+        return report
+
+
+def start_background_gc(interval, delete=False):
+    """Run collect_garbage every `interval` seconds on a daemon thread"""
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                report = collect_garbage(delete=delete)
+                if report['orphaned']:
+                    print(f"Media GC: {report['orphaned']} orphaned file(s), "
+                          f"{report['reclaimed_bytes']} bytes reclaimed")
+            except Exception as e:
+                print(f"Media GC failed: {str(e)}")
+
+    thread = threading.Thread(target=loop, name="media-gc", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Clean up orphaned student photos and QR codes")
+    parser.add_argument("--delete", action="store_true", help="delete files instead of quarantining them")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be removed")
+    args = parser.parse_args()
+
+    result = collect_garbage(delete=args.delete, dry_run=args.dry_run)
+    print(f"Scanned {result['scanned']} file(s), {result['orphaned']} orphaned, "
+          f"{result['reclaimed_bytes']} bytes reclaimed ({result['mode']})")
+    if result['orphaned_attendance']:
+        print(f"Removed {result['orphaned_attendance']} orphaned attendance record(s)")
+    for error in result['errors']:
+        print(f"  error: {error}")
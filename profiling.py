@@ -0,0 +1,131 @@
+import io
+import json
+import os
+import random
+import re
+import time
+from datetime import datetime
+
+import database  # type: ignore
+
+PROFILE_DIR = os.path.join(database.APP_DIR, "profiles")
+MAX_PROFILES = int(os.environ.get("PROFILE_MAX_SAVED", "50"))
+
+# Fraction of admin requests profiled even without the explicit flag
+SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+
+# Request a profile with this header or query parameter
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY_ARG = "_profile"
+
+
+def should_profile(is_admin, headers, args):
+    """Profiling is admin-only: on request via header/query flag, or sampled"""
+    if not is_admin:
+        return False
+    if headers.get(PROFILE_HEADER) == "1" or args.get(PROFILE_QUERY_ARG) == "1":
+        return True
+    return SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE
+
+
+class RequestProfile:
+    """cProfile plus SQL timings for a single request"""
+
+    def __init__(self):
+        import cProfile
+        
+        self.profiler = cProfile.Profile()
+        self.started = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        database.start_sql_recording()
+        self.profiler.enable()
+
+    def stop_and_save(self, route, method, path, status):
+        """Stop profiling and write the profile to PROFILE_DIR; returns its name"""
+        self.profiler.disable()
+        sql = database.stop_sql_recording()
+        duration_ms = (time.perf_counter() - self.started) * 1000
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        name = f"{stamp}_{re.sub(r'[^A-Za-z0-9_.-]+', '_', route or 'unknown')}"
+        self.profiler.dump_stats(os.path.join(PROFILE_DIR, f"{name}.prof"))
+        meta = {
+            "name": name,
+            "route": route,
+            "method": method,
+            "path": path,
+            "status": status,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "duration_ms": round(duration_ms, 2),
+            "sql_count": len(sql),
+            "sql_ms": round(sum(ms for _, ms in sql), 2),
+            "sql": [{"sql": stmt, "ms": round(ms, 3)} for stmt, ms in sql],
+        }
+        with open(os.path.join(PROFILE_DIR, f"{name}.json"), "w") as f:
+            json.dump(meta, f)
+
+        _prune()
+        return name
+
+
+def _prune():
+    """Keep only the newest MAX_PROFILES profiles on disk"""
+    names = sorted(n[:-5] for n in os.listdir(PROFILE_DIR) if n.endswith(".json"))
+    for old in names[:-MAX_PROFILES] if len(names) > MAX_PROFILES else []:
+        for ext in (".json", ".prof"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, old + ext))
+            except OSError:
+                pass
+
+
+def list_profiles():
+    """Saved profile summaries, newest first"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for filename in sorted(os.listdir(PROFILE_DIR), reverse=True):
+        if not filename.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(PROFILE_DIR, filename)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        meta.pop("sql", None)
+        profiles.append(meta)
+    return profiles
+
+
+def load_profile(name, limit=30, sort="cumulative"):
+    """Load a saved profile with its top `limit` hotspots, or None"""
+    if not re.fullmatch(r"[A-Za-z0-9_.-]+", name):
+        return None
+    meta_path = os.path.join(PROFILE_DIR, f"{name}.json")
+    prof_path = os.path.join(PROFILE_DIR, f"{name}.prof")
+    if not (os.path.exists(meta_path) and os.path.exists(prof_path)):
+        return None
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+
+    import pstats
+    
+    stats = pstats.Stats(prof_path, stream=io.StringIO())
+    stats.sort_stats(sort)
+    hotspots = []
+    for func in stats.fcn_list[:limit]:
+        calls, primitive_calls, tottime, cumtime, _ = stats.stats[func]
+        filename, line, function = func
+        hotspots.append({
+            "function": f"{function} ({os.path.basename(filename)}:{line})",
+            "calls": calls if calls == primitive_calls else f"{calls}/{primitive_calls}",
+            "tottime_ms": round(tottime * 1000, 3),
+            "cumtime_ms": round(cumtime * 1000, 3),
+        })
+    meta["hotspots"] = hotspots
+    meta["sql"] = sorted(meta.get("sql", []), key=lambda q: q["ms"], reverse=True)
+    return meta
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    """Per-key token bucket, holding at most `max_keys` buckets (LRU evicted)"""
+
+    def __init__(self, rate, capacity, max_keys=10000):
+        self.rate = rate            # tokens added per second
+        self.capacity = capacity    # burst size
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()   # key -> [tokens, last_refill]
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    def allow(self, key):
+        """Take a token for `key`; returns (allowed, seconds until next token)"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [self.capacity, now]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                self.allowed += 1
+                return True, 0
+            self.rejected += 1
+            return False, (1 - bucket[0]) / self.rate
+
+    def stats(self):
+        with self._lock:
+            return {
+                'allowed': self.allowed,
+                'rejected': self.rejected,
+                'evicted': self.evicted,
+                'tracked_keys': len(self._buckets),
+            }
+
+
+class RequestCoalescer:
+    """Run at most one call per key at a time; concurrent callers share its result"""
+
+    def __init__(self):
+        self._in_flight = {}    # key -> [event, result, error]
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def run(self, key, func, *args):
+        with self._lock:
+            entry = self._in_flight.get(key)
+            leader = entry is None
+            if leader:
+                entry = [threading.Event(), None, None]
+                self._in_flight[key] = entry
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            entry[0].wait()
+            if entry[2] is not None:
+                raise entry[2]
+            return entry[1]
+
+        try:
+            entry[1] = func(*args)
+            return entry[1]
+        except Exception as e:
+            entry[2] = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            entry[0].set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._in_flight),
+            }
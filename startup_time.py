@@ -0,0 +1,84 @@
+"""Measure cold-start time of the web app in fresh interpreters.
+
+Each run imports app.py in a new process (as a worker or test run would) and
+then calls create_app() against a scratch database; the first run builds the
+schema, later runs find it current and skip it.
+
+    python startup_time.py --runs 5 --budget-ms 400
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RUN_SNIPPET = '''
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app(DATABASE={db!r}, MEDIA_GC_INTERVAL=0, BACKUP_INTERVAL=0, BUILD_ASSETS=False)
+done = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "init_ms": (done - imported) * 1000,
+    "schema_built": app.STARTUP_TIMINGS["schema_built"],
+}}))
+'''
+
+
+def run_once(db_path):
+    """Start one interpreter; returns (timings dict, {module: self microseconds})"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", RUN_SNIPPET.format(db=db_path)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(self_us)
+    return json.loads(result.stdout.strip().splitlines()[-1]), modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure web app cold-start time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list")
+    parser.add_argument("--budget-ms", type=float, help="exit non-zero if the median import is slower")
+    args = parser.parse_args()
+
+    runs = []
+    module_times = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "startup.db")
+        for _ in range(args.runs):
+            timings, modules = run_once(db_path)
+            runs.append(timings)
+            for name, self_us in modules.items():
+                module_times.setdefault(name, []).append(self_us)
+
+    import_ms = statistics.median(r["import_ms"] for r in runs)
+    warm = [r["init_ms"] for r in runs if not r["schema_built"]]
+    cold = [r["init_ms"] for r in runs if r["schema_built"]]
+    print(f"import app:        {import_ms:7.1f} ms (median of {len(runs)})")
+    if cold:
+        print(f"create_app (new):  {cold[0]:7.1f} ms (schema built)")
+    if warm:
+        print(f"create_app:        {statistics.median(warm):7.1f} ms (schema current, skipped)")
+
+    print(f"\nSlowest modules by own import time (median):")
+    slowest = sorted(module_times.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for name, times in slowest[:args.top]:
+        print(f"  {statistics.median(times) / 1000:7.1f} ms  {name}")
+
+    if args.budget_ms is not None and import_ms > args.budget_ms:
+        raise SystemExit(f"\nImport took {import_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    main()
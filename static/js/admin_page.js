@@ -0,0 +1,161 @@
+function togglePassword() {
+  const passwordInput = document.getElementById("admin-password");
+  const toggleIcon = document.querySelector(".toggle-password");
+
+  if (passwordInput.type === "password") {
+    passwordInput.type = "text";
+    toggleIcon.textContent = "🙈";
+  } else {
+    passwordInput.type = "password";
+    toggleIcon.textContent = "👁️";
+  }
+}
+
+function showMessage(text, isError = false) {
+  const messageDiv = document.getElementById("message");
+  messageDiv.textContent = text;
+  messageDiv.className = "message " + (isError ? "error" : "success");
+  messageDiv.style.display = "block";
+
+  setTimeout(() => {
+    messageDiv.style.display = "none";
+  }, 3000);
+}
+
+function clearForm() {
+  document.getElementById("admin-id").value = "";
+  document.getElementById("admin-email").value = "";
+  document.getElementById("admin-password").value = "";
+  document.getElementById("form-title").textContent = "ADD NEW USER";
+  document.getElementById("save-btn").textContent = "SAVE";
+  document.getElementById("cancel-btn").style.display = "none";
+
+  // Reset password field to hidden
+  const passwordInput = document.getElementById("admin-password");
+  const toggleIcon = document.querySelector(".toggle-password");
+  passwordInput.type = "password";
+  toggleIcon.textContent = "👁️";
+}
+
+function cancelEdit() {
+  clearForm();
+}
+
+function saveAdmin() {
+  const adminId = document.getElementById("admin-id").value;
+  const email = document.getElementById("admin-email").value.trim();
+  const password = document.getElementById("admin-password").value.trim();
+
+  if (!email || !password) {
+    showMessage("Please fill in all fields", true);
+    return;
+  }
+
+  const url = adminId ? `/api/admin/update/${adminId}` : "/api/admin/add";
+  const method = adminId ? "PUT" : "POST";
+
+  fetch(url, {
+    method: method,
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({
+      email: email,
+      password: password,
+    }),
+  })
+    .then((response) => response.json())
+    .then((data) => {
+      if (data.success) {
+        showMessage(data.message, false);
+        clearForm();
+        // Reload page to show updated data
+        setTimeout(() => {
+          window.location.reload();
+        }, 1000);
+      } else {
+        showMessage(data.message, true);
+      }
+    })
+    .catch((error) => {
+      showMessage("Error: " + error.message, true);
+    });
+}
+
+function editAdmin(adminId) {
+  fetch(`/api/admin/get/${adminId}`)
+    .then((response) => response.json())
+    .then((data) => {
+      if (data.success) {
+        const admin = data.admin;
+        document.getElementById("admin-id").value = admin.id;
+        document.getElementById("admin-email").value = admin.email;
+        document.getElementById("admin-password").value = admin.password;
+        document.getElementById("form-title").textContent = "EDIT USER";
+        document.getElementById("save-btn").textContent = "UPDATE";
+        document.getElementById("cancel-btn").style.display = "block";
+
+        // Scroll to form
+        document
+          .querySelector(".form-card")
+          .scrollIntoView({ behavior: "smooth" });
+      } else {
+        showMessage(data.message, true);
+      }
+    })
+    .catch((error) => {
+      showMessage("Error loading admin: " + error.message, true);
+    });
+}
+
+function deleteAdmin(adminId) {
+  if (!confirm("Are you sure you want to delete this admin user?")) {
+    return;
+  }
+
+  fetch(`/api/admin/delete/${adminId}`, {
+    method: "DELETE",
+    headers: {
+      "Content-Type": "application/json",
+    },
+  })
+    .then((response) => response.json())
+    .then((data) => {
+      if (data.success) {
+        showMessage(data.message, false);
+        // Reload page to show updated data
+        setTimeout(() => {
+          window.location.reload();
+        }, 1000);
+      } else {
+        showMessage(data.message, true);
+      }
+    })
+    .catch((error) => {
+      showMessage("Error: " + error.message, true);
+    });
+}
+
+function toggleMenu() {
+  const sidebar = document.querySelector(".sidebar");
+  sidebar.classList.toggle("active");
+}
+
+// Close menu when clicking on a nav item
+document.addEventListener("DOMContentLoaded", function () {
+  const navItems = document.querySelectorAll(".nav-item");
+  navItems.forEach((item) => {
+    item.addEventListener("click", function () {
+      document.querySelector(".sidebar").classList.remove("active");
+    });
+  });
+
+  const inputs = document.querySelectorAll(".form-card input");
+  inputs.forEach((input) => {
+    input.addEventListener("keypress", function (e) {
+      if (e.key === "Enter") {
+        saveAdmin();
+      }
+    });
+  });
+});
@@ -0,0 +1,31 @@
+document.addEventListener("DOMContentLoaded", function () {
+  const form = document.querySelector("form");
+  const password = document.querySelector('input[name="password"]');
+  const confirmPassword = document.querySelector(
+    'input[name="confirm_password"]'
+  );
+
+  form.addEventListener("submit", function (e) {
+    if (password.value !== confirmPassword.value) {
+      e.preventDefault();
+      alert("Passwords do not match!");
+      return false;
+    }
+
+    if (password.value.length < 6) {
+      e.preventDefault();
+      alert("Password must be at least 6 characters long!");
+      return false;
+    }
+  });
+
+  confirmPassword.addEventListener("input", function () {
+    if (password.value && confirmPassword.value) {
+      if (password.value === confirmPassword.value) {
+        confirmPassword.style.borderColor = "#2e7d32";
+      } else {
+        confirmPassword.style.borderColor = "#c62828";
+      }
+    }
+  });
+});
@@ -0,0 +1,52 @@
+function goBack() {
+  window.history.back(); // Go back to previous page
+}
+
+let seconds = 3;
+const counterElement = document.getElementById("counter");
+
+const interval = setInterval(() => {
+  counterElement.textContent = `Closing in ${seconds} second${
+    seconds > 1 ? "s" : ""
+  }...`;
+  seconds--;
+
+  if (seconds < 0) {
+    clearInterval(interval);
+    goBack(); // automatically go back after countdown
+  }
+}, 1000); // update every 1 second
+
+function getQueryParams() {
+  const params = new URLSearchParams(window.location.search);
+  return {
+    id: params.get("id") || "",
+    lastname: params.get("lastname") || "",
+    firstname: params.get("firstname") || "",
+    course: params.get("course") || "",
+    level: params.get("level") || "",
+  };
+}
+
+document.addEventListener("DOMContentLoaded", () => {
+  const profile = getQueryParams();
+
+  const values = document.querySelectorAll(".info-values .info-row");
+
+  if (values.length >= 5) {
+    values[0].textContent = profile.id;
+    values[1].textContent = profile.lastname.toUpperCase();
+    values[2].textContent = profile.firstname.toUpperCase();
+    values[3].textContent = profile.course.toUpperCase();
+    values[4].textContent = profile.level;
+  }
+
+  if (profile.id) {
+    const avatar = document.querySelector(".avatar-circle");
+    const photoUrl = `/static/photos/${profile.id}_photo.png`;
+    avatar.style.backgroundImage = `url(${photoUrl})`;
+    avatar.style.backgroundSize = "cover";
+    avatar.style.backgroundPosition = "center";
+    avatar.style.backgroundRepeat = "no-repeat";
+  }
+});
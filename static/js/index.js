@@ -0,0 +1,277 @@
+let html5QrcodeScanner = null;
+let lastScannedCode = null;
+let scanCooldown = false;
+
+// Local copy of the roster ({version, students: {id: [lastname, firstname,
+// course, level, thumb_url]}}) so scans are validated without a round trip
+const ROSTER_KEY = "kiosk-roster";
+const ROSTER_SYNC_MS = 60000;
+// Scans waiting to be sent ([{student_id, scanned_at}]), kept across reloads
+const QUEUE_KEY = "kiosk-pending-scans";
+const RETRY_MIN_MS = 2000;
+const RETRY_MAX_MS = 60000;
+
+let roster = loadStored(ROSTER_KEY, null);
+let pendingScans = loadStored(QUEUE_KEY, []);
+let flushing = false;
+let retryDelay = RETRY_MIN_MS;
+let retryTimer = null;
+// The scan currently on screen; only its server reply updates the page
+let displayedScan = null;
+
+function loadStored(key, fallback) {
+  try {
+    const value = localStorage.getItem(key);
+    return value ? JSON.parse(value) : fallback;
+  } catch (err) {
+    return fallback;
+  }
+}
+
+function store(key, value) {
+  try {
+    localStorage.setItem(key, JSON.stringify(value));
+  } catch (err) {
+    console.warn(`Could not save ${key}:`, err);
+  }
+}
+
+async function syncRoster() {
+  const url = roster
+    ? `/api/roster/changes?since=${roster.version}`
+    : "/api/roster";
+  const response = await fetch(url);
+  const data = await response.json();
+  if (!data.success) {
+    throw new Error(data.message);
+  }
+  if (data.reset) {
+    roster = null;
+    return syncRoster();
+  }
+
+  const next = url === "/api/roster" ? { version: 0, students: {} } : roster;
+  for (const row of data.students) {
+    next.students[row[0]] = row.slice(1);
+  }
+  for (const id of data.deleted || []) {
+    delete next.students[id];
+  }
+  next.version = data.version;
+  roster = next;
+  store(ROSTER_KEY, roster);
+}
+
+function showResult(text, photoUrl) {
+  const resultDiv = document.getElementById("qr-result");
+  const photo = document.getElementById("qr-result-photo");
+  document.getElementById("qr-result-text").textContent = text;
+  resultDiv.classList.add("active");
+  if (photoUrl) {
+    photo.src = photoUrl;
+    photo.style.display = "block";
+  } else {
+    photo.style.display = "none";
+  }
+}
+
+function showMessage(kind, text) {
+  const errorDiv = document.getElementById("error-message");
+  const successDiv = document.getElementById("success-message");
+  errorDiv.style.display = "none";
+  successDiv.style.display = "none";
+  if (kind) {
+    const div = kind === "error" ? errorDiv : successDiv;
+    div.textContent = text;
+    div.style.display = "block";
+  }
+}
+
+function onScanSuccess(decodedText, decodedResult) {
+  // Prevent duplicate scans within 2 seconds
+  if (scanCooldown || lastScannedCode === decodedText) {
+    return;
+  }
+
+  lastScannedCode = decodedText;
+  scanCooldown = true;
+
+  // Reset cooldown after 2 seconds
+  setTimeout(() => {
+    scanCooldown = false;
+    lastScannedCode = null;
+  }, 2000);
+
+  console.log(`QR Code scanned: ${decodedText}`);
+  const scan = { student_id: decodedText, scanned_at: new Date().toISOString() };
+
+  if (!roster) {
+    // No roster yet (first visit while offline): let the server decide
+    showResult(`Scanning QR Code: ${decodedText}...`);
+    showMessage(null);
+    queueScan(scan);
+    return;
+  }
+
+  const student = roster.students[decodedText];
+  if (student) {
+    acceptScan(scan, student);
+    return;
+  }
+
+  // Not on the local roster; it may have been enrolled since the last sync
+  showResult(`Scanning QR Code: ${decodedText}...`);
+  showMessage(null);
+  syncRoster().then(
+    () => {
+      const fresh = roster.students[decodedText];
+      if (fresh) {
+        acceptScan(scan, fresh);
+      } else {
+        showResult(`QR Code: ${decodedText}`);
+        showMessage("error", "✗ Student not found");
+      }
+    },
+    (err) => {
+      // Could not check (offline or not enrolled): let the server decide
+      console.warn("Roster sync failed:", err);
+      queueScan(scan);
+    }
+  );
+}
+
+function acceptScan(scan, student) {
+  const [lastname, firstname, course, level, thumbUrl] = student;
+  showResult(`Student: ${firstname} ${lastname}`, thumbUrl);
+  showMessage("success", `✓ Welcome, ${firstname}! (${course}-${level})`);
+  queueScan(scan);
+}
+
+function queueScan(scan) {
+  displayedScan = scan;
+  pendingScans.push(scan);
+  store(QUEUE_KEY, pendingScans);
+  flushQueue();
+}
+
+function scheduleRetry(delay) {
+  clearTimeout(retryTimer);
+  retryTimer = setTimeout(flushQueue, delay);
+}
+
+// Send queued scans in order; stop at the first network failure and retry with backoff
+async function flushQueue() {
+  if (flushing) {
+    return;
+  }
+  flushing = true;
+  try {
+    while (pendingScans.length) {
+      const scan = pendingScans[0];
+      let response;
+      try {
+        response = await fetch("/api/scan-attendance", {
+          method: "POST",
+          headers: {
+            "Content-Type": "application/json",
+          },
+          body: JSON.stringify(scan),
+        });
+      } catch (err) {
+        if (scan === displayedScan) {
+          showMessage("success", "✓ Saved on this kiosk, will sync when the connection is back");
+        }
+        scheduleRetry(retryDelay);
+        retryDelay = Math.min(retryDelay * 2, RETRY_MAX_MS);
+        return;
+      }
+
+      if (response.status === 429 || response.status >= 500) {
+        const retryAfter = Number(response.headers.get("Retry-After")) || 0;
+        scheduleRetry(Math.max(retryAfter * 1000, retryDelay));
+        retryDelay = Math.min(retryDelay * 2, RETRY_MAX_MS);
+        return;
+      }
+
+      // Any other reply is final for this scan
+      retryDelay = RETRY_MIN_MS;
+      pendingScans.shift();
+      store(QUEUE_KEY, pendingScans);
+      const data = await response.json().catch(() => ({ success: false, message: "Bad response" }));
+      if (scan === displayedScan) {
+        showScanReply(scan, data);
+      }
+    }
+  } finally {
+    flushing = false;
+  }
+}
+
+function showScanReply(scan, data) {
+  if (data.success) {
+    if (data.student.firstname == null) {
+      showMessage("error", "STUDENT ALREADY RECORDED!");
+      return;
+    }
+    showMessage("success", `✓ ${data.message} - Time: ${data.attendance.time_in}`);
+
+    setTimeout(() => {
+      window.location.href = `/static/check_user?id=${data.student.id}&firstname=${data.student.firstname}&lastname=${data.student.lastname}&course=${data.student.course}&level=${data.student.level}`;
+    }, 1000);
+  } else {
+    showResult(`QR Code: ${scan.student_id}`);
+    showMessage("error", `✗ ${data.message}`);
+  }
+}
+
+function onScanFailure(error) {
+  // Handle scan failure - usually ignored for continuous scanning
+  // console.log(`QR Code scan error: ${error}`);
+}
+
+// Initialize QR Code Scanner when page loads
+document.addEventListener("DOMContentLoaded", function () {
+  const qrReaderDiv = document.getElementById("qr-reader");
+
+  html5QrcodeScanner = new Html5Qrcode("qr-reader");
+
+  const config = {
+    fps: 10,
+    qrbox: { width: 250, height: 250 },
+    aspectRatio: 1.6,
+  };
+
+  html5QrcodeScanner
+    .start(
+      { facingMode: "environment" }, // Use back camera on mobile, or default camera
+      config,
+      onScanSuccess,
+      onScanFailure
+    )
+    .catch((err) => {
+      // Handle camera permission errors
+      const errorDiv = document.getElementById("error-message");
+      errorDiv.textContent = `Camera error: ${err.message}. Please allow camera access and refresh the page.`;
+      errorDiv.style.display = "block";
+      console.error("Error starting QR scanner:", err);
+    });
+
+  // Keep the roster fresh and send any scans left over from before a reload
+  const sync = () => syncRoster().catch((err) => console.warn("Roster sync failed:", err));
+  sync();
+  setInterval(sync, ROSTER_SYNC_MS);
+  window.addEventListener("online", () => {
+    sync();
+    flushQueue();
+  });
+  flushQueue();
+});
+
+// Clean up scanner when page unloads
+window.addEventListener("beforeunload", function () {
+  if (html5QrcodeScanner) {
+    html5QrcodeScanner.clear().catch((err) => {
+      console.error("Error clearing QR scanner:", err);
+    });
+  }
+});
@@ -0,0 +1,270 @@
+let stream = null;
+let capturedPhotoData = null;
+let studentId = null;
+
+// Initialize camera on page load
+document.addEventListener("DOMContentLoaded", function () {
+  startCamera();
+  generateStudentId();
+
+  // Update preview as user types
+  document
+    .getElementById("lastname")
+    .addEventListener("input", updatePreview);
+  document
+    .getElementById("firstname")
+    .addEventListener("input", updatePreview);
+  document
+    .getElementById("course")
+    .addEventListener("change", updatePreview);
+  document
+    .getElementById("level")
+    .addEventListener("change", updatePreview);
+});
+
+function startCamera() {
+  navigator.mediaDevices
+    .getUserMedia({ video: { facingMode: "user" } })
+    .then(function (mediaStream) {
+      stream = mediaStream;
+      const video = document.getElementById("video");
+      video.srcObject = mediaStream;
+    })
+    .catch(function (err) {
+      console.error("Error accessing camera:", err);
+      showMessage(
+        "Error accessing camera. Please allow camera permissions.",
+        true
+      );
+    });
+}
+
+function stopCamera() {
+  if (stream) {
+    stream.getTracks().forEach((track) => track.stop());
+    stream = null;
+  }
+}
+
+function capturePhoto() {
+  const video = document.getElementById("video");
+  const canvas = document.createElement("canvas");
+  canvas.width = video.videoWidth;
+  canvas.height = video.videoHeight;
+  canvas.getContext("2d").drawImage(video, 0, 0);
+
+  capturedPhotoData = canvas.toDataURL("image/png");
+
+  // Show captured photo
+  const capturedPhoto = document.getElementById("captured-photo");
+  capturedPhoto.src = capturedPhotoData;
+  capturedPhoto.style.display = "block";
+  video.style.display = "none";
+
+  // Update preview
+  updatePhotoPreview();
+
+  // Show retake button and hide SNAP button
+  document.getElementById("snap-btn").style.display = "none";
+  document.getElementById("retake-btn").style.display = "block";
+
+  // Stop camera
+  stopCamera();
+
+  // Enable save button if form is filled
+  checkFormComplete();
+
+  // Show message that photo is captured
+  showMessage(
+    "Photo captured! Review information and click SAVE to continue.",
+    false
+  );
+}
+
+function retakePhoto() {
+  capturedPhotoData = null;
+  const video = document.getElementById("video");
+  const capturedPhoto = document.getElementById("captured-photo");
+
+  capturedPhoto.style.display = "none";
+  video.style.display = "block";
+
+  document.getElementById("snap-btn").style.display = "block";
+  document.getElementById("retake-btn").style.display = "none";
+
+  startCamera();
+  updatePhotoPreview();
+  checkFormComplete();
+}
+
+function updatePhotoPreview() {
+  const preview = document.getElementById("photo-preview");
+  if (capturedPhotoData) {
+    preview.innerHTML = `<img src="${capturedPhotoData}" alt="Student photo">`;
+  } else {
+    preview.innerHTML =
+      '<div class="photo-preview-placeholder">No Photo</div>';
+  }
+}
+
+function generateStudentId() {
+  fetch("/api/student/generate-id")
+    .then((response) => response.json())
+    .then((data) => {
+      if (data.success) {
+        studentId = data.student_id;
+        document.getElementById("idno").value = studentId;
+        document.getElementById("preview-idno").textContent = studentId;
+        generateQRCode(studentId);
+      }
+    })
+    .catch((error) => {
+      console.error("Error generating student ID:", error);
+    });
+}
+
+function generateQRCode(text) {
+  const container = document.getElementById("qr-code-container");
+  container.innerHTML = ""; // Clear previous QR code
+
+  // Generate QR code on client side for preview
+  QRCode.toCanvas(
+    container,
+    text,
+    {
+      width: 90,
+      margin: 2,
+      color: {
+        dark: "#000000",
+        light: "#FFFFFF",
+      },
+    },
+    function (error) {
+      if (error) {
+        console.error("Error generating QR code:", error);
+        container.innerHTML =
+          '<div style="font-size: 11px; color: #999;">QR ERROR</div>';
+      }
+    }
+  );
+}
+
+function displayQRCodeFromServer(qrPath) {
+  const container = document.getElementById("qr-code-container");
+  if (qrPath) {
+    container.innerHTML = `<img src="/${qrPath}" alt="QR Code" style="max-width: 100%; max-height: 100%;">`;
+  }
+}
+
+function updatePreview() {
+  document.getElementById("preview-lastname").textContent =
+    document.getElementById("lastname").value.toUpperCase() || "----";
+  document.getElementById("preview-firstname").textContent =
+    document.getElementById("firstname").value.toUpperCase() || "----";
+  document.getElementById("preview-course").textContent =
+    document.getElementById("course").value || "----";
+  document.getElementById("preview-level").textContent =
+    document.getElementById("level").value || "----";
+
+  checkFormComplete();
+}
+
+function checkFormComplete() {
+  const lastname = document.getElementById("lastname").value.trim();
+  const firstname = document.getElementById("firstname").value.trim();
+  const course = document.getElementById("course").value;
+  const level = document.getElementById("level").value;
+
+  const isComplete =
+    lastname &&
+    firstname &&
+    course &&
+    level &&
+    capturedPhotoData &&
+    studentId;
+  const saveBtn = document.getElementById("save-btn");
+  if (saveBtn) {
+    saveBtn.disabled = !isComplete;
+  }
+}
+
+function showMessage(text, isError = false) {
+  const messageDiv = document.getElementById("message");
+  messageDiv.textContent = text;
+  messageDiv.className = "message " + (isError ? "error" : "success");
+  messageDiv.style.display = "block";
+
+  setTimeout(() => {
+    messageDiv.style.display = "none";
+  }, 5000);
+}
+
+function saveStudent() {
+  const lastname = document.getElementById("lastname").value.trim();
+  const firstname = document.getElementById("firstname").value.trim();
+  const course = document.getElementById("course").value;
+  const level = document.getElementById("level").value;
+
+  if (
+    !lastname ||
+    !firstname ||
+    !course ||
+    !level ||
+    !capturedPhotoData ||
+    !studentId
+  ) {
+    showMessage("Please fill in all fields and capture a photo", true);
+    return;
+  }
+
+  const saveBtn = document.getElementById("save-btn");
+  saveBtn.disabled = true;
+  saveBtn.textContent = "SAVING...";
+
+  fetch("/api/student/add", {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({
+      student_id: studentId,
+      lastname: lastname,
+      firstname: firstname,
+      course: course,
+      level: level,
+      photo: capturedPhotoData,
+    }),
+  })
+    .then((response) => response.json())
+    .then((data) => {
+      if (data.success) {
+        showMessage("Student added successfully!", false);
+        // Display the server-generated QR code
+        if (data.qr_path) {
+          displayQRCodeFromServer(data.qr_path);
+        }
+        setTimeout(() => {
+          window.location.href = "/admin/students";
+        }, 2000);
+      } else {
+        showMessage(data.message || "Error saving student", true);
+        saveBtn.disabled = false;
+        saveBtn.textContent = "SAVE";
+      }
+    })
+    .catch((error) => {
+      showMessage("Error: " + error.message, true);
+      saveBtn.disabled = false;
+      saveBtn.textContent = "SAVE";
+    });
+}
+
+function cancelAndGoBack() {
+  stopCamera();
+  window.location.href = "/admin/students";
+}
+
+// Clean up camera on page unload
+window.addEventListener("beforeunload", function () {
+  stopCamera();
+});
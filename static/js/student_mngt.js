@@ -0,0 +1,146 @@
+function toggleMenu() {
+  const sidebar = document.querySelector(".sidebar");
+  sidebar.classList.toggle("active");
+}
+
+// Close menu when clicking on a nav item
+document.addEventListener("DOMContentLoaded", function () {
+  const navItems = document.querySelectorAll(".nav-item");
+  navItems.forEach((item) => {
+    item.addEventListener("click", function () {
+      document.querySelector(".sidebar").classList.remove("active");
+    });
+  });
+});
+
+function viewStudent(studentId) {
+  fetch(`/api/student/get/${studentId}`)
+    .then((response) => response.json())
+    .then((data) => {
+      if (data.success) {
+        const student = data.student;
+
+        // ID stays static
+        document.getElementById("student-id").textContent = student.id;
+
+        // Make Name editable
+        document.getElementById(
+          "student-name"
+        ).innerHTML = `<input type="text" id="edit-name" value="${student.lastname}, ${student.firstname}">`;
+
+        // Make Course-Level editable
+        document.getElementById(
+          "student-course"
+        ).innerHTML = `<input type="text" id="edit-course" list="course-level-options" value="${student.course}-${student.level}">`;
+
+        // Update photo if available
+        if (student.photo) {
+          const avatar = document.querySelector(".avatar");
+          avatar.style.backgroundImage = `url(/${student.photo})`;
+          avatar.style.backgroundSize = "cover";
+          avatar.style.backgroundPosition = "center";
+        }
+
+        // Display QR code
+        const qrBox = document.querySelector(".qr-code-box");
+        if (student.qr_code) {
+          qrBox.innerHTML = `<img src="/${student.qr_code}" alt="QR Code" style="max-width:100%; max-height:100%;">`;
+        } else if (typeof QRCode !== "undefined") {
+          qrBox.innerHTML = "";
+          QRCode.toCanvas(qrBox, student.id, {
+            width: 110,
+            margin: 2,
+          }).catch((err) => {
+            console.error("QR generation error:", err);
+            qrBox.innerHTML = "QR CODE";
+          });
+        }
+      }
+    })
+    .catch((error) => {
+      alert("Error loading student: " + error.message);
+    });
+}
+
+function updateStudent() {
+  const studentId = document.getElementById("student-id").textContent;
+  const fullName = document
+    .getElementById("student-name")
+    .querySelector("input")
+    .value.trim();
+  const courseLevel = document
+    .getElementById("student-course")
+    .querySelector("input")
+    .value.trim();
+
+  if (!fullName || !courseLevel) {
+    alert("Name and Course-Level cannot be empty");
+    return;
+  }
+
+  // Split full name
+  const [lastName, firstName] = fullName.split(",").map((s) => s.trim());
+
+  // Split course-level
+  const [course, level] = courseLevel.split("-").map((s) => s.trim());
+
+  fetch(`/api/student/update/${studentId}`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({
+      firstname: firstName,
+      lastname: lastName,
+      course: course,
+      level: level,
+    }),
+  })
+    .then((res) => res.json())
+    .then((data) => {
+      if (data.success) {
+        alert("Student updated successfully");
+
+        // Update the table row directly
+        const rows = document.querySelectorAll(
+          ".table-body-scroll tbody tr"
+        );
+        rows.forEach((row) => {
+          if (row.children[0].textContent === studentId) {
+            row.children[1].textContent = lastName;
+            row.children[2].textContent = firstName;
+            row.children[3].textContent = course;
+            row.children[4].textContent = level;
+          }
+        });
+      } else {
+        alert(data.message || "Failed to update student");
+      }
+    })
+    .catch((err) => {
+      alert("Error: " + err.message);
+    });
+}
+
+function deleteStudent(studentId) {
+  if (!confirm("Are you sure you want to delete this student?")) {
+    return;
+  }
+
+  fetch(`/api/student/delete/${studentId}`, {
+    method: "DELETE",
+    headers: {
+      "Content-Type": "application/json",
+    },
+  })
+    .then((response) => response.json())
+    .then((data) => {
+      if (data.success) {
+        alert("Student deleted successfully");
+        window.location.reload();
+      } else {
+        alert(data.message || "Error deleting student");
+      }
+    })
+    .catch((error) => {
+      alert("Error: " + error.message);
+    });
+}
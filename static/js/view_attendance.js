@@ -0,0 +1,204 @@
+function toggleMenu() {
+  const sidebar = document.querySelector(".sidebar");
+  sidebar.classList.toggle("active");
+}
+
+// Close menu when clicking on a nav item
+document.addEventListener("DOMContentLoaded", function () {
+  const navItems = document.querySelectorAll(".nav-item");
+  navItems.forEach((item) => {
+    item.addEventListener("click", function () {
+      document.querySelector(".sidebar").classList.remove("active");
+    });
+  });
+
+  // Set default date to today if not set
+  const dateInput = document.getElementById("date");
+  if (!dateInput.value) {
+    const today = new Date().toISOString().split("T")[0];
+    dateInput.value = today;
+  }
+});
+
+function filterAttendance() {
+  const dateInput = document.getElementById("date");
+  const selectedDate = dateInput.value;
+
+  if (selectedDate) {
+    // Redirect to the same page with the date parameter
+    window.location.href = `${dateInput.dataset.pageUrl}?date=${selectedDate}`;
+  }
+}
+
+// Allow Enter key to trigger filter
+document.addEventListener("DOMContentLoaded", function () {
+  const dateInput = document.getElementById("date");
+  dateInput.addEventListener("keypress", function (e) {
+    if (e.key === "Enter") {
+      filterAttendance();
+    }
+  });
+});
+
+async function deleteAttendance(attendanceId, selectedDate) {
+  if (
+    !confirm("Are you sure you want to delete this attendance record?")
+  ) {
+    return;
+  }
+
+  try {
+    const response = await fetch(
+      `/api/attendance/delete/${attendanceId}`,
+      {
+        method: "DELETE",
+        headers: {
+          "Content-Type": "application/json",
+        },
+      }
+    );
+
+    if (!response.ok) {
+      const errorText = await response.text();
+      console.error("Server response:", errorText);
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    const data = await response.json();
+
+    if (data.success) {
+      removeRows([attendanceId]);
+    } else {
+      alert(data.message);
+    }
+  } catch (error) {
+    console.error("Delete error:", error);
+    alert("Failed to delete attendance record: " + error.message);
+  }
+}
+
+function selectedIds() {
+  return Array.from(
+    document.querySelectorAll(".row-select:checked")
+  ).map((box) => parseInt(box.value, 10));
+}
+
+function updateSelection() {
+  const count = selectedIds().length;
+  document.getElementById("selected-count").textContent =
+    count + " selected";
+  document.getElementById("bulk-delete-btn").disabled = count === 0;
+  document.getElementById("bulk-move-btn").disabled = count === 0;
+}
+
+function toggleSelectAll(checked) {
+  document.querySelectorAll(".row-select").forEach((box) => {
+    box.checked = checked;
+  });
+  updateSelection();
+}
+
+// Update the table in place instead of reloading the page
+function removeRows(ids) {
+  const body = document.getElementById("attendance-body");
+  ids.forEach((id) => {
+    const row = body.querySelector(`tr[data-id="${id}"]`);
+    if (row) row.remove();
+  });
+
+  const rows = body.querySelectorAll("tr[data-id]");
+  rows.forEach((row, index) => {
+    row.querySelector(".row-index").textContent = index + 1;
+  });
+
+  if (rows.length === 0 && !body.querySelector(".empty-row")) {
+    body.innerHTML = `<tr class="empty-row">
+      <td colspan="9" style="text-align: left; padding-left: 20px">
+        No attendance records for the selected date.
+      </td>
+    </tr>`;
+  }
+
+  document.getElementById("select-all").checked = false;
+  updateSelection();
+}
+
+async function postBulk(url, payload) {
+  const response = await fetch(url, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify(payload),
+  });
+  const data = await response.json();
+  if (!data.success) {
+    throw new Error(data.message || `HTTP error! status: ${response.status}`);
+  }
+  return data;
+}
+
+async function bulkDeleteSelected() {
+  const ids = selectedIds();
+  if (ids.length === 0) return;
+
+  try {
+    const preview = await postBulk("/api/attendance/bulk-delete", {
+      ids: ids,
+      dry_run: true,
+    });
+    if (
+      !confirm(`Delete ${preview.matched} attendance record(s)?`)
+    ) {
+      return;
+    }
+
+    const data = await postBulk("/api/attendance/bulk-delete", {
+      ids: ids,
+    });
+    removeRows(ids);
+    alert(data.message);
+  } catch (error) {
+    console.error("Bulk delete error:", error);
+    alert("Failed to delete attendance records: " + error.message);
+  }
+}
+
+async function bulkMoveSelected() {
+  const ids = selectedIds();
+  const newDate = document.getElementById("move-date").value;
+  if (ids.length === 0) return;
+  if (!newDate) {
+    alert("Please choose the date to move the records to.");
+    return;
+  }
+
+  try {
+    const preview = await postBulk("/api/attendance/bulk-redate", {
+      ids: ids,
+      new_date: newDate,
+      dry_run: true,
+    });
+    let question = `Move ${preview.matched} record(s) to ${newDate}?`;
+    if (preview.skipped > 0) {
+      question += ` ${preview.skipped} will be skipped (already recorded on that day).`;
+    }
+    if (!confirm(question)) {
+      return;
+    }
+
+    const data = await postBulk("/api/attendance/bulk-redate", {
+      ids: ids,
+      new_date: newDate,
+    });
+    // Records moved to another day no longer belong on this page
+    // defaultValue is the date the page was rendered for
+    if (newDate !== document.getElementById("date").defaultValue) {
+      removeRows(data.updated_ids);
+    }
+    alert(data.message);
+  } catch (error) {
+    console.error("Bulk move error:", error);
+    alert("Failed to move attendance records: " + error.message);
+  }
+}
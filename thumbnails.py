@@ -0,0 +1,34 @@
+import hashlib
+import os
+
+THUMB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thumb_cache")
+# Square thumbnails this many pixels wide, for the kiosk roster
+THUMB_SIZE = int(os.environ.get("ROSTER_THUMB_SIZE", "96"))
+
+
+def get_thumbnail(photo_path):
+    """Path of a small JPEG thumbnail of a student photo, rendered on first use.
+
+    Returns None if there is no photo. Cached files are keyed by the photo's
+    path, size and mtime, so a replaced photo gets a new thumbnail.
+    """
+    if not photo_path or not os.path.exists(photo_path):
+        return None
+
+    stat = os.stat(photo_path)
+    key = hashlib.sha1(f"{photo_path}:{stat.st_size}:{stat.st_mtime_ns}:{THUMB_SIZE}".encode()).hexdigest()
+    path = os.path.join(THUMB_DIR, f"{key}.jpg")
+    if os.path.exists(path):
+        return path
+
+    from PIL import Image, ImageOps
+
+    with Image.open(photo_path) as src:
+        thumb = ImageOps.fit(src.convert("RGB"), (THUMB_SIZE, THUMB_SIZE), Image.LANCZOS)
+
+    # Write atomically so a concurrent request never serves a half-written file
+    os.makedirs(THUMB_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    thumb.save(tmp_path, "JPEG", quality=80)
+    os.replace(tmp_path, path)
+    return path